@@ -1,3 +1,6 @@
+import threading
+from types import MappingProxyType
+from typing import Mapping, Optional
 from agents import Agent
 from Goal_Analyzer import analyze_goal_tool
 from Meal_Planner import meal_planner_tool
@@ -7,8 +10,22 @@ from Tracker import progress_tracker_tool
 from Escalation_Agent import create_escalation_agent
 from Nutrition_Expert_Agent import create_nutrition_expert_agent
 from Injury_Support_Agent import create_injury_support_agent
-from Guardrails import validate_goal_input, validate_diet_input, validate_injury_input
-from Hooks import HealthRunHooks
+from Guardrails import check_health_input
+from Hooks import HealthAgentHooks
+
+HEALTH_AGENT_NAME = "HealthWellnessPlanner"
+
+_registry_lock = threading.Lock()
+_agent_registry: Optional[Mapping[str, Agent]] = None
+
+def latest_user_text(input) -> str:
+    """Text of the newest user message, whether input is a string or an input item list."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user" and isinstance(item.get("content"), str):
+            return item["content"]
+    return ""
 
 # Wrapper result for guardrails
 class GuardrailResult:
@@ -16,26 +33,13 @@ class GuardrailResult:
         self.output = type('Output', (), {})()
         self.output.tripwire_triggered = not passed
 
-class GoalInputGuardrail:
-    async def run(self, agent, input, context):
-        passed = validate_goal_input(input)
-        return GuardrailResult(passed)
-    def get_name(self):
-        return "GoalInputGuardrail"
-
-class DietInputGuardrail:
+class HealthInputGuardrail:
+    """Goal, diet and injury checks in one pass; trips if any of them fails."""
     async def run(self, agent, input, context):
-        passed = validate_diet_input(input)
-        return GuardrailResult(passed)
+        verdict = check_health_input(latest_user_text(input))
+        return GuardrailResult(verdict.passed)
     def get_name(self):
-        return "DietInputGuardrail"
-
-class InjuryInputGuardrail:
-    async def run(self, agent, input, context):
-        passed = validate_injury_input(input)
-        return GuardrailResult(passed)
-    def get_name(self):
-        return "InjuryInputGuardrail"
+        return "HealthInputGuardrail"
 
 def create_health_agent():
     tools = [
@@ -45,14 +49,16 @@ def create_health_agent():
         checkin_scheduler_tool,
         progress_tracker_tool,
     ]
+    # One hooks object for the whole graph, so tool results reach the session whichever agent ran them
+    hooks = HealthAgentHooks()
     handoffs = {
-        "escalation": create_escalation_agent(handoff_description="Escalates to a human coach when the user requests human support or is dissatisfied with automated help."),
-        "nutrition": create_nutrition_expert_agent(handoff_description="Handles complex dietary needs, allergies, or medical nutrition questions."),
-        "injury": create_injury_support_agent(handoff_description="Supports users with physical limitations or injury-specific workout needs."),
+        "escalation": create_escalation_agent(handoff_description="Escalates to a human coach when the user requests human support or is dissatisfied with automated help.", hooks=hooks),
+        "nutrition": create_nutrition_expert_agent(handoff_description="Handles complex dietary needs, allergies, or medical nutrition questions.", hooks=hooks),
+        "injury": create_injury_support_agent(handoff_description="Supports users with physical limitations or injury-specific workout needs.", hooks=hooks),
     }
-    input_guardrails = [GoalInputGuardrail(), DietInputGuardrail(), InjuryInputGuardrail()]
+    input_guardrails = [HealthInputGuardrail()]
     return Agent(
-        name="HealthWellnessPlanner",
+        name=HEALTH_AGENT_NAME,
         instructions="""You are a comprehensive Health & Wellness Planner Agent with expertise in fitness, nutrition, and wellness coaching. Your role is to provide personalized, actionable health advice and create detailed plans for users.
 
 CORE RESPONSIBILITIES:
@@ -74,7 +80,7 @@ RESPONSE GUIDELINES:
 
 WHEN CREATING PLANS:
 - Meal Plans: Include specific foods, portions, calorie counts, and timing
-- Workout Plans: Specify exercises, sets, reps, duration, and intensity
+- Workout Plans: Specify exercises, sets, reps, duration, and intensity; pass the user's injury notes to workout_recommender
 - Progress Tracking: Set measurable milestones and check-in schedules
 - Safety: Always consider user limitations and provide modifications
 
@@ -87,7 +93,28 @@ CONVERSATION STYLE:
 
 Always strive to provide comprehensive, personalized responses that help users achieve their health and wellness goals.""",
         tools=tools,
-        handoffs=handoffs,
+        handoffs=list(handoffs.values()),  # The SDK takes a list; a dict would be iterated as its keys
         input_guardrails=input_guardrails,
-        hooks=HealthRunHooks(),
-    ) 
\ No newline at end of file
+        hooks=hooks,
+    )
+
+def get_agent_registry() -> Mapping[str, Agent]:
+    """
+    Read-only map of agent name -> Agent, built once per process.
+    Agents hold no per-user state (that lives in the run context), so every
+    session shares the same graph; treat the agents as immutable.
+    """
+    global _agent_registry
+    if _agent_registry is None:
+        with _registry_lock:
+            if _agent_registry is None:
+                agent = create_health_agent()
+                registry = {agent.name: agent}
+                for sub_agent in agent.handoffs:
+                    registry[sub_agent.name] = sub_agent
+                _agent_registry = MappingProxyType(registry)
+    return _agent_registry
+
+def get_health_agent() -> Agent:
+    """The shared top-level health agent."""
+    return get_agent_registry()[HEALTH_AGENT_NAME]
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Async storage API mirroring Database.py.
+
+Calls run on dedicated DB threads so agent turns never block the event loop:
+writes go through a single writer thread (serialized, in submission order)
+and reads use a small reader pool sized like the connection pool.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import Database
+from Context import UserSessionContext
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+_readers = ThreadPoolExecutor(max_workers=Database.POOL_SIZE, thread_name_prefix="db-reader")
+
+async def _run(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+async def run_read(func, *args, **kwargs):
+    """Run a blocking read on the reader pool."""
+    return await _run(_readers, func, *args, **kwargs)
+
+async def run_write(func, *args, **kwargs):
+    """Run a blocking write on the serialized writer thread."""
+    return await _run(_writer, func, *args, **kwargs)
+
+async def init_db():
+    await run_write(Database.init_db)
+
+async def create_user(name: str, email: str = None, password_hash: str = None) -> int:
+    return await run_write(Database.create_user, name, email, password_hash)
+
+async def get_user_by_email(email: str) -> dict | None:
+    return await run_read(Database.get_user_by_email, email)
+
+async def get_user_by_uid(uid: int) -> dict | None:
+    return await run_read(Database.get_user_by_uid, uid)
+
+async def update_last_login(uid: int):
+    await run_write(Database.update_last_login, uid)
+
+async def save_session(context: UserSessionContext):
+    await run_write(Database.save_session, context)
+
+async def load_session(uid: int, history_limit: int | None = Database.HISTORY_WINDOW) -> UserSessionContext | None:
+    return await run_read(Database.load_session, uid, history_limit)
+
+async def get_recent_messages(uid: int, limit: int = 10) -> list:
+    return await run_read(Database.get_recent_messages, uid, limit)
+
+async def count_messages(uid: int) -> int:
+    return await run_read(Database.count_messages, uid)
+
+async def clear_messages(context: UserSessionContext):
+    await run_write(Database.clear_messages, context)
+
+async def get_all_users() -> list:
+    return await run_read(Database.get_all_users)
+
+def shutdown(wait: bool = True):
+    """Stop the DB threads, letting queued writes finish when wait is True."""
+    _writer.shutdown(wait=wait)
+    _readers.shutdown(wait=wait)
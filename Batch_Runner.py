@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Run scripted conversations through the health agent in bulk.
+
+The input is JSONL with one {"uid": ..., "message": ...} object per line.
+Turns for different users run concurrently (bounded by --concurrency) while
+each user's messages run in file order. Results are appended to the output
+JSONL as they finish, one object per input line; rerunning with the same
+output file skips lines that already succeeded, so an interrupted batch
+resumes where it stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import Async_Database as async_db
+from Orchestrator import HealthOrchestrator
+
+BATCH_CONCURRENCY = int(os.getenv("HEALTH_BATCH_CONCURRENCY", "16"))
+
+def read_batch(path: str):
+    """Return ({uid: [(line, message), ...]}, invalid_count) in file order."""
+    turns, invalid = {}, 0
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                uid = int(item["uid"])
+                message = str(item["message"]).strip()
+            except (ValueError, KeyError, TypeError):
+                invalid += 1
+                continue
+            if not message:
+                invalid += 1
+                continue
+            turns.setdefault(uid, []).append((line_no, message))
+    return turns, invalid
+
+def completed_lines(path: str) -> set:
+    """Input line numbers that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # Partial last line from an interrupted run
+            if "response" in result:
+                done.add(result["line"])
+    return done
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class BatchRunner:
+    def __init__(self, orchestrator: HealthOrchestrator | None = None,
+                 concurrency: int = BATCH_CONCURRENCY):
+        self.orchestrator = orchestrator or HealthOrchestrator()
+        self.concurrency = concurrency
+        self.latencies = []
+        self.succeeded = 0
+        self.failed = 0
+
+    async def _run_user(self, uid: int, turns: list, slots: asyncio.Semaphore, out):
+        for line_no, message in turns:
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    response = await self.orchestrator.run_turn(uid, message)
+                    if not response:
+                        raise RuntimeError("Agent returned no response")
+                    result = {"line": line_no, "uid": uid, "message": message, "response": response}
+                    self.succeeded += 1
+                except Exception as e:
+                    result = {"line": line_no, "uid": uid, "message": message, "error": str(e)}
+                    self.failed += 1
+                elapsed = time.perf_counter() - start
+            self.latencies.append(elapsed)
+            result["seconds"] = round(elapsed, 4)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+    async def run(self, input_path: str, output_path: str) -> dict:
+        await async_db.init_db()
+        turns, invalid = read_batch(input_path)
+        done = completed_lines(output_path)
+        pending = {}
+        for uid, user_turns in turns.items():
+            remaining = [turn for turn in user_turns if turn[0] not in done]
+            if remaining:
+                pending[uid] = remaining
+        total = sum(len(t) for t in pending.values())
+        print(f"📋 {total} turns for {len(pending)} users ({len(done)} already done, {invalid} invalid lines)")
+
+        slots = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out:
+            await asyncio.gather(*(
+                self._run_user(uid, user_turns, slots, out)
+                for uid, user_turns in pending.items()
+            ))
+        seconds = time.perf_counter() - start
+        self.orchestrator.sessions.flush()
+
+        latencies = sorted(self.latencies)
+        return {
+            "turns": len(latencies),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": len(done),
+            "invalid": invalid,
+            "seconds": seconds,
+            "turns_per_sec": len(latencies) / seconds if seconds else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run (uid, message) turns from a JSONL file through the agent.")
+    parser.add_argument("input", help="JSONL file with uid and message per line")
+    parser.add_argument("output", help="JSONL results file (appended to; reused to resume)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="concurrent agent turns")
+    args = parser.parse_args()
+
+    runner = BatchRunner(concurrency=args.concurrency)
+    try:
+        stats = asyncio.run(runner.run(args.input, args.output))
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrupted - rerun with the same output file to resume")
+        return False
+    except Exception as e:
+        print(f"❌ Batch failed: {e}")
+        return False
+    finally:
+        runner.orchestrator.close()
+
+    print(f"✅ Succeeded: {stats['succeeded']}  ❌ Failed: {stats['failed']}")
+    print(f"   Time: {stats['seconds']:.2f}s ({stats['turns_per_sec']:.2f} turns/sec)")
+    print(f"   Latency p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s")
+    return stats["failed"] == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark agent construction per session against the shared agent registry.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import Agent
+
+SESSIONS = 200
+
+def measure(build) -> tuple[float, float]:
+    """Average ms and KiB allocated (still live) per session for `build`."""
+    agents = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(SESSIONS):
+        agents.append(build())  # Keep a reference, like a logged-in session would
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / SESSIONS * 1000, current / SESSIONS / 1024
+
+def main():
+    print("🤖 Agent Registry Benchmark")
+    print("=" * 60)
+    Agent.get_agent_registry()  # Registry is built once per process, outside the loop
+    rows = [
+        ("create_health_agent()", Agent.create_health_agent),
+        ("get_health_agent()", Agent.get_health_agent),
+    ]
+    print(f"{'per session':<24} {'ms':>10} {'KiB':>10}")
+    results = []
+    for label, build in rows:
+        ms, kib = measure(build)
+        results.append((ms, kib))
+        print(f"{label:<24} {ms:>10.4f} {kib:>10.2f}")
+    (build_ms, build_kib), (shared_ms, shared_kib) = results
+    print(f"\nSaved per session: {build_ms - shared_ms:.4f} ms, {build_kib - shared_kib:.2f} KiB "
+          f"({len(Agent.get_agent_registry())} agents shared)")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
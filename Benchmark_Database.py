@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark database throughput: connection-per-call vs. the pooled connections.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import Database
+from Context import UserSessionContext
+from Session_Codec import encode_payload, decode_payload
+
+OPERATIONS = 2000
+BULK_USERS = 100000
+
+def naive_turn(db_path: str, context: UserSessionContext):
+    """One chat turn the way Database.py used to do it: a new connection per call."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("SELECT * FROM users WHERE uid = ?", (context.uid,)).fetchone()
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT data, codec FROM sessions WHERE uid = ?", (context.uid,)).fetchone()
+        UserSessionContext.model_validate_json(decode_payload(row[1], row[0]))
+    with sqlite3.connect(db_path) as conn:
+        codec, data = encode_payload(context.model_dump_json(exclude=Database.SESSION_EXCLUDE))
+        conn.execute("""
+            INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated, codec)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (context.uid, context.name, context.email, data, context.created_at, context.last_updated, codec))
+        conn.commit()
+
+def pooled_turn(context: UserSessionContext):
+    """The same turn through the pooled Database API."""
+    Database.get_user_by_uid(context.uid)
+    Database.load_session(context.uid)
+    Database.save_session(context)
+
+def run_benchmark(label: str, func, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(OPERATIONS):
+        func(*args)
+    elapsed = time.perf_counter() - start
+    ops = OPERATIONS * 3 / elapsed
+    print(f"{label:<28} {OPERATIONS} turns in {elapsed:.2f}s -> {ops:,.0f} ops/sec")
+    return ops
+
+def check_user_search_plans() -> bool:
+    """EXPLAIN every iter_users prefix query: each must walk its index in order, without a sort step."""
+    ok = True
+    with Database.get_pool().connection() as conn:
+        for name_prefix, email_prefix, index in (("Bulk 9", None, "idx_users_name"), (None, "bulk9", "sqlite_autoindex_users_1")):
+            for after_key in (False, True):
+                query, _ = Database._user_page_query(name_prefix, email_prefix, after_key)
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, (0,) * query.count("?"))]
+                uses_index = any(index in step for step in plan) and not any("TEMP B-TREE" in step for step in plan)
+                ok = ok and uses_index
+                print(f"{'ok ' if uses_index else 'BAD'} {index:<26} {'; '.join(plan)}")
+    return ok
+
+def time_user_search(label: str, **prefix) -> float:
+    start = time.perf_counter()
+    found = sum(1 for _ in Database.iter_users(**prefix))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {found} users in {elapsed * 1000:.1f} ms")
+    return elapsed
+
+def main():
+    print("🗄️ Database Benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        Database.DB_PATH = os.path.join(tmp, "bench.db")
+        Database.init_db()
+        uid = Database.create_user("Bench User", "bench@example.com", "bench")
+        context = Database.load_session(uid)
+
+        before = run_benchmark("connection per call", naive_turn, Database.DB_PATH, context)
+        after = run_benchmark("pooled connections", pooled_turn, context)
+
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            Database.create_user(f"Loop {i}", f"loop{i}@example.com", "bench")
+        loop_rate = OPERATIONS / (time.perf_counter() - start)
+        print(f"{'create_user loop':<28} {loop_rate:,.0f} users/sec")
+
+        records = ({"name": f"Bulk {i}", "email": f"bulk{i}@example.com", "password": "bench"} for i in range(BULK_USERS))
+        stats = Database.create_users_bulk(records)
+        print(f"{'create_users_bulk':<28} {stats['users_per_sec']:,.0f} users/sec ({stats['inserted']} users)")
+
+        time_user_search("iter_users name prefix", name_prefix="Bulk 9999")
+        time_user_search("iter_users email prefix", email_prefix="bulk9999")
+        plans_ok = check_user_search_plans()
+        Database.close_pool()
+
+    print("-" * 60)
+    print(f"Speedup: {after / before:.1f}x per turn, {stats['users_per_sec'] / loop_rate:.1f}x bulk provisioning")
+    return after >= before and plans_ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
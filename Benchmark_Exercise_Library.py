@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark injury-safe workout plans: cold adaptation per goal/injury mask,
+warm lookups per request, and a check of every adapted plan. A block fails
+when it names a contraindicated exercise or no library exercise at all
+(rest days aside), since an unrecognized block was never checked; a swap
+fails when the replacement shares no muscle group with the exercise.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from Exercise_Library import Contraindication, get_exercise_library, injury_mask
+from Workout_Recommender import WORKOUT_PLANS, safe_workout_plan, workout_goal_type
+
+TARGET_WARM_US = 50  # Per request, injury text to adapted plan
+INJURY_NOTES = [
+    "knee pain", "lower back pain", "shoulder injury", "sprained ankle", "wrist pain",
+    "hip replacement surgery", "stiff neck", "recovering from knee surgery",
+    "bad back and a sore shoulder", "physical therapy for my ankle", "",
+]
+GOALS = ["lose weight", "build muscle", "improve endurance", "get stronger", "stay healthy"]
+
+def plan_failures(plan, unsafe: int) -> list:
+    library = get_exercise_library()
+    failures = []
+    for day in plan.day_plans:
+        for block in day.exercises:
+            named, label_named = library.block_exercises(block)
+            if not named and not day.rest:
+                failures.append(f"unrecognized: {block.render()}")
+            failures += [f"unsafe: {exercise.name}" for exercise, _ in named + label_named if unsafe >> exercise.id & 1]
+    for note in plan.substitutions or ():
+        old, arrow, new = note.partition(" -> ")
+        if arrow and not library.lookup(old).muscles & library.lookup(new).muscles:
+            failures.append(f"no shared muscles: {note}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure injury-safe workout plan latency.")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print("🩹 Exercise Library Benchmark")
+    print("=" * 60)
+    library = get_exercise_library()
+    masks = range(1 << len(Contraindication))
+    start = time.perf_counter()
+    failures = []
+    for goal_type in WORKOUT_PLANS:
+        for avoid in masks:
+            plan = safe_workout_plan(goal_type, avoid)
+            failures += plan_failures(plan, library.unsafe_mask(Contraindication(avoid)))
+    cold = (time.perf_counter() - start) / (len(WORKOUT_PLANS) * len(masks))
+    print(f"Library: {len(library.exercises)} exercises; "
+          f"{len(WORKOUT_PLANS) * len(masks):,} goal/injury plans adapted and checked, {cold * 1e6:.0f} us each")
+    print(f"{'✅' if not failures else '❌'} Unsafe, unrecognized or unrelated blocks in adapted plans: {len(failures)}")
+    for failure in sorted(set(failures))[:10]:
+        print(f"   {failure}")
+
+    rng = random.Random(args.seed)
+    requests = [(rng.choice(GOALS), rng.choice(INJURY_NOTES)) for _ in range(args.requests)]
+    start = time.perf_counter()
+    for goal, notes in requests:
+        safe_workout_plan(workout_goal_type(goal), int(injury_mask(notes)))
+    warm = (time.perf_counter() - start) / args.requests
+    status = "✅" if warm * 1e6 <= TARGET_WARM_US else "❌"
+    print(f"{status} {args.requests:,} requests: {warm * 1e6:.1f} us each (target {TARGET_WARM_US} us)")
+    return not failures and warm * 1e6 <= TARGET_WARM_US
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
\ No newline at end of file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the meal plan optimizer: plans per minute on one core, checked
+against the 10k users/minute target, and the share of plans whose every day
+is within tolerance of the calorie and macro target. A plan may only miss
+the target when no combination in the catalog meets it.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from Goal_Analyzer import analyze_goal
+from Meal_Optimizer import get_meal_optimizer, nutrition_target, optimize_meal_plan
+
+TARGET_PLANS_PER_MIN = 10_000
+MIN_WITHIN_TOLERANCE = 0.70  # Keto and paleo targets are out of the catalog's reach
+TAG_SETS = [
+    ["balanced"], ["vegetarian"], ["vegan"], ["keto"], ["mediterranean"], ["paleo"],
+    ["high-protein"], ["vegan", "gluten-free", "high-protein"], ["vegetarian", "dairy-free"],
+]
+GOALS = [
+    "lose 5 kg in 2 months", "lose 10 pounds in 6 weeks", "build muscle and gain 3 kg",
+    "improve endurance", "get fit and healthy", "",
+]
+EXCLUSIONS = [[], [], ["tofu"], ["salmon", "tuna"], ["eggs"]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure meal plan optimizer throughput.")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    goals = [analyze_goal(text) if text else None for text in GOALS]
+    requests = [(rng.choice(TAG_SETS), rng.choice(goals), rng.choice(EXCLUSIONS)) for _ in range(args.users)]
+
+    print("🥗 Meal Optimizer Benchmark")
+    print("=" * 60)
+    optimizer = get_meal_optimizer()
+    start = time.perf_counter()
+    for tags, _, exclude in requests:
+        optimizer.combinations(tags, exclude)  # Warm the per-constraint combination cache
+    warm = time.perf_counter() - start
+    print(f"Catalog: {len(optimizer.catalog.meals)} meals, "
+          f"{len(optimizer._combos)} constraint sets warmed in {warm * 1000:.1f} ms")
+
+    plans = []
+    start = time.perf_counter()
+    for tags, goal, exclude in requests:
+        plans.append(optimize_meal_plan(tags, goal, exclude))
+    elapsed = time.perf_counter() - start
+    rate = args.users / elapsed * 60
+    status = "✅" if rate >= TARGET_PLANS_PER_MIN else "❌"
+    print(f"{status} {args.users:,} plans in {elapsed:.2f}s = {rate:,.0f} plans/min (target {TARGET_PLANS_PER_MIN:,})")
+
+    within = sum(plan["within_tolerance"] for plan in plans) / args.users
+    # A one-day plan is within tolerance exactly when some combination meets the target
+    avoidable = sum(
+        not plan["within_tolerance"]
+        and optimizer.optimize(tags, *nutrition_target(goal, tags), exclude, days=1)["within_tolerance"]
+        for plan, (tags, goal, exclude) in zip(plans, requests)
+    )
+    accurate = within >= MIN_WITHIN_TOLERANCE and not avoidable
+    print(f"{'✅' if accurate else '❌'} Within tolerance: {within:.0%} (minimum {MIN_WITHIN_TOLERANCE:.0%}); "
+          f"missed although the catalog meets the target: {avoidable}")
+    return rate >= TARGET_PLANS_PER_MIN and accurate
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark session payload codecs: stored bytes and save/load time per size.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import Database
+import Session_Codec
+from Context import UserSessionContext
+from Tracker import progress_tracker
+
+TURN_COUNTS = [10, 100, 1000]
+REPEATS = 50
+SEED = 7
+
+# Pieces of the progress updates users actually send, combined at random
+ACTIVITIES = ["ran", "cycled", "swam", "walked", "did yoga for", "lifted weights for", "hiked", "rowed"]
+FOODS = ["oatmeal with berries", "a chicken salad", "lentil soup", "salmon and rice", "a protein shake",
+         "greek yogurt", "two slices of pizza", "stir-fried tofu", "a burrito bowl"]
+FEELINGS = ["tired but motivated", "sore in my legs", "really energetic", "a bit stressed", "great",
+            "hungry most evenings", "like I'm sleeping better"]
+AGENTS = ["NutritionExpertAgent", "InjurySupportAgent", "EscalationAgent"]
+
+def random_update(rng: random.Random) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"Lost {rng.choice([0.2, 0.5, 0.8, 1, 1.5, 2])} kg this week, now at {rng.uniform(60, 110):.1f} kg"
+    if kind == 1:
+        return (f"I {rng.choice(ACTIVITIES)} {rng.randint(15, 90)} minutes on day {rng.randint(1, 7)}"
+                f" and felt {rng.choice(FEELINGS)}")
+    if kind == 2:
+        meals = ", ".join(rng.sample(FOODS, rng.randint(1, 3)))
+        return f"Ate {meals} today; skipped {rng.choice(['breakfast', 'snacks', 'dessert', 'nothing'])}"
+    return f"Slept {rng.uniform(5, 9):.1f} hours and my energy was {rng.choice(['low', 'okay', 'high'])}, mood {rng.choice(FEELINGS)}"
+
+def build_context(uid: int, turns: int) -> UserSessionContext:
+    """A session that has logged `turns` varied progress updates and handoffs over several months."""
+    rng = random.Random(SEED + uid)
+    start = datetime(2024, 1, 1, 7, 30)
+    context = UserSessionContext(name=f"Bench {uid}", uid=uid, created_at=start.isoformat())
+    context.goal = {"quantity": 5.0, "metric": "kg", "duration": "2 months", "goal_type": "weight_loss"}
+    moment = start
+    for _ in range(turns):
+        moment += timedelta(hours=rng.randint(2, 40), minutes=rng.randint(0, 59), seconds=rng.randint(0, 59))
+        update = random_update(rng)
+        # Real tool output, stamped with this update's time
+        result = {**progress_tracker(uid, update), "timestamp": moment.isoformat()}
+        context.progress_logs.append({"input": update, "result": result})
+        if rng.random() < 0.3:
+            context.handoff_logs.append(f"HealthWellnessPlanner -> {rng.choice(AGENTS)} at {moment.isoformat()}")
+    context.last_updated = moment.isoformat()
+    return context
+
+def measure(codec: int, context: UserSessionContext) -> tuple[int, float, float]:
+    Session_Codec.DEFAULT_CODEC = codec
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        Database.save_session(context)
+    save_ms = (time.perf_counter() - start) / REPEATS * 1000
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        Database.load_session(context.uid)
+    load_ms = (time.perf_counter() - start) / REPEATS * 1000
+    with sqlite3.connect(Database.DB_PATH) as conn:
+        size = conn.execute("SELECT length(data) FROM sessions WHERE uid = ?", (context.uid,)).fetchone()[0]
+    return size, save_ms, load_ms
+
+def main():
+    print("🗜️ Session Codec Benchmark")
+    print("=" * 72)
+    print(f"{'turns':>6} {'codec':<10} {'bytes':>10} {'save ms':>10} {'load ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        Database.DB_PATH = os.path.join(tmp, "bench.db")
+        Database.init_db()
+        for uid, turns in enumerate(TURN_COUNTS, 1):
+            context = build_context(uid, turns)
+            sizes = {}
+            for codec, label in ((Session_Codec.CODEC_JSON, "json"), (Session_Codec.CODEC_ZLIB_JSON, "zlib-json")):
+                size, save_ms, load_ms = measure(codec, context)
+                sizes[label] = size
+                print(f"{turns:>6} {label:<10} {size:>10,} {save_ms:>10.3f} {load_ms:>10.3f}")
+            print(f"{'':>6} {'ratio':<10} {sizes['json'] / sizes['zlib-json']:>9.1f}x")
+        Database.close_pool()
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
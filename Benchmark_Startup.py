@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Startup-time check for the CLI entry points.
+
+Imports each entry point in a fresh interpreter with `-X importtime`, prints
+the slowest imports and exits with status 1 if any entry point takes longer
+than the budget to import (median of a few runs).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ["CLI"]
+STARTUP_BUDGET_MS = float(os.getenv("HEALTH_STARTUP_BUDGET_MS", "400"))
+RUNS = 5
+TOP_IMPORTS = 10
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in microseconds per module for one fresh import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if CLI cold start exceeds the import-time budget.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="entry-point modules to import")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    print("🚀 Startup Benchmark")
+    print("=" * 60)
+    ok = True
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(RUNS)]
+        total_ms = statistics.median(run[module] for run in runs) / 1000
+        status = "✅" if total_ms <= args.budget_ms else "❌"
+        print(f"{status} import {module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+        for name, micros in [item for item in slowest if item[0] != module][:TOP_IMPORTS]:
+            print(f"     {micros / 1000:>8.1f} ms  {name}")
+        ok = ok and total_ms <= args.budget_ms
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -10,23 +10,18 @@ import sys
 from datetime import datetime
 from typing import Optional
 
-from openai import OpenAI
-
-from Agent import create_health_agent
 from Context import UserSessionContext
-from Database import init_db, create_user, get_user_by_email, get_user_by_uid, update_last_login, save_session, load_session, get_all_users
+from Database import init_db, create_user, get_user_by_email, get_user_by_uid, update_last_login, iter_users, count_messages, clear_messages
 from Orchestrator import HealthOrchestrator
-from PDF_Report import generate_user_report
-
-# Initialize database
-init_db()
+from Session_Cache import SessionCache
 
 class HealthAgentCLI:
     def __init__(self):
-        self.client = OpenAI()
-        self.orchestrator = HealthOrchestrator()
+        self.sessions = SessionCache()
+        self.orchestrator = HealthOrchestrator(sessions=self.sessions)
         self.current_user: Optional[UserSessionContext] = None
         self.agent = None
+        self.ttft_samples = []  # Time to first token per streamed turn
         
     def clear_screen(self):
         """Clear the terminal screen."""
@@ -101,7 +96,7 @@ class HealthAgentCLI:
             return False
             
         # Load user session
-        context = load_session(user['uid'])
+        context = self.sessions.get(user['uid'])
         if not context:
             print("❌ Failed to load user session!")
             return False
@@ -127,7 +122,7 @@ class HealthAgentCLI:
             print("❌ User not found!")
             return False
             
-        context = load_session(uid)
+        context = self.sessions.get(uid)
         if not context:
             print("❌ Failed to load user session!")
             return False
@@ -137,21 +132,23 @@ class HealthAgentCLI:
         print(f"✅ Welcome back, {user['name']}!")
         return True
         
-    def show_users(self):
-        """Show all registered users (admin function)."""
+    def show_users(self, page_size: int = 20):
+        """Show registered users a page at a time (admin function)."""
         print("\n👥 Registered Users")
         print("-" * 30)
         
-        users = get_all_users()
-        if not users:
-            print("No users registered yet.")
-            return
-            
-        for user in users:
+        shown = 0
+        for user in iter_users(page_size=page_size):
             print(f"ID: {user['uid']} | Name: {user['name']} | Email: {user['email'] or 'N/A'}")
             print(f"  Created: {user['created_at']}")
             print(f"  Last Login: {user['last_login'] or 'Never'}")
             print()
+            shown += 1
+            if shown % page_size == 0:
+                if input("Press Enter for more users, or 'q' to stop: ").strip().lower() == "q":
+                    return
+        if not shown:
+            print("No users registered yet.")
             
     def download_report(self):
         """Download user's health report."""
@@ -160,8 +157,11 @@ class HealthAgentCLI:
             return
         print(f"\n📊 Generating report for {self.current_user.name}...")
         try:
+            # Recent turns come from the session cache, pending ones included
+            recent = self.sessions.recent_messages(self.current_user.uid, 10)
             # Generate PDF report
-            report_path = generate_user_report(self.current_user)
+            from PDF_Report import generate_user_report  # fpdf loads only when a report is requested
+            report_path = generate_user_report(self.current_user, recent)
             print(f"✅ Report generated successfully!")
             print(f"📁 Report saved to: {report_path}")
             # Also save as JSON for easy viewing
@@ -176,11 +176,11 @@ class HealthAgentCLI:
                 },
                 "goals": self.current_user.goal,
                 "diet_preferences": self.current_user.diet_preferences,
-                "workout_plan": self.current_user.workout_plan,
-                "meal_plan": self.current_user.meal_plan,
+                "workout_plan": self.current_user.workout_plan and self.current_user.workout_plan.to_dict(),
+                "meal_plan": self.current_user.meal_plan and self.current_user.meal_plan.to_dict(),
                 "injury_notes": self.current_user.injury_notes,
                 "progress_logs": self.current_user.progress_logs,
-                "conversation_history": self.current_user.conversation_history[-10:],  # Last 10 messages
+                "conversation_history": recent,  # Last 10 messages
                 "handoff_logs": self.current_user.handoff_logs
             }
             with open(json_path, 'w') as f:
@@ -212,6 +212,7 @@ class HealthAgentCLI:
             print("❌ Please login first!")
             return
             
+        self.sessions.flush([self.current_user.uid])
         print(f"\n📋 Context for {self.current_user.name}:")
         print("-" * 40)
         print(f"User ID: {self.current_user.uid}")
@@ -224,7 +225,7 @@ class HealthAgentCLI:
         print(f"Meal Plan: {'Set' if self.current_user.meal_plan else 'Not set'}")
         print(f"Injury Notes: {self.current_user.injury_notes or 'None'}")
         print(f"Progress Logs: {len(self.current_user.progress_logs)} entries")
-        print(f"Conversation History: {len(self.current_user.conversation_history)} messages")
+        print(f"Conversation History: {count_messages(self.current_user.uid)} messages")
         print(f"Handoff Logs: {len(self.current_user.handoff_logs)} entries")
         
     def clear_conversation(self):
@@ -233,8 +234,8 @@ class HealthAgentCLI:
             print("❌ Please login first!")
             return
             
-        self.current_user.conversation_history = []
-        save_session(self.current_user)
+        self.sessions.flush([self.current_user.uid])
+        clear_messages(self.current_user)
         print("✅ Conversation history cleared!")
         
     def chat_with_agent(self, message: str):
@@ -255,40 +256,19 @@ class HealthAgentCLI:
             })
             # Create agent if not exists
             if not self.agent:
-                self.agent = create_health_agent()
-            # Run the agent
-            run_result = self.orchestrator.run_agent(
+                from Agent import get_health_agent  # Agents SDK loads on the first chat
+                self.agent = get_health_agent()
+            # Stream the agent's answer as it is generated
+            print("🤖 Agent: ", end="", flush=True)
+            turn = self.orchestrator.run_agent_streamed(
                 self.agent,
                 message,
                 self.current_user
             )
-            # Debug: print the full run_result structure
-            print("\n[DEBUG] Raw agent output:")
-            print(run_result)
-            print("[END DEBUG]\n")
-            # Extract response - handle different result types
-            response = None
-            if run_result:
-                # If it's a dict-like object
-                if isinstance(run_result, dict):
-                    if 'final_output' in run_result and run_result['final_output']:
-                        response = run_result['final_output']
-                    elif 'output' in run_result and run_result['output']:
-                        response = run_result['output']
-                    elif 'content' in run_result and run_result['content']:
-                        response = run_result['content']
-                    else:
-                        response = '\n'.join(str(v) for v in run_result.values() if isinstance(v, str))
-                elif hasattr(run_result, 'final_output') and getattr(run_result, 'final_output', None):
-                    response = run_result.final_output
-                elif hasattr(run_result, 'output') and getattr(run_result, 'output', None):
-                    response = run_result.output
-                elif hasattr(run_result, 'content') and getattr(run_result, 'content', None):
-                    response = run_result.content
-                elif isinstance(run_result, str):
-                    response = run_result
-                else:
-                    response = str(run_result)
+            response = turn["text"]
+            streamed = turn["ttft"] is not None
+            if streamed:
+                self.ttft_samples.append(turn["ttft"])
             # Fallback if no response
             if not response or not isinstance(response, str) or not response.strip():
                 self._fail_count += 1
@@ -306,15 +286,19 @@ class HealthAgentCLI:
                 "content": response,
                 "timestamp": datetime.now().isoformat()
             })
-            # Save updated context
-            save_session(self.current_user)
-            print(f"🤖 Agent: {response}")
+            # Schedule the updated context for the next batched write
+            self.sessions.mark_dirty(self.current_user)
+            if streamed:
+                print(f"\n   ⏱️ first token {turn['ttft']:.2f}s, total {turn['seconds']:.2f}s")
+            else:
+                print(response)
         except Exception as e:
             print(f"❌ Error: {e}")
-            save_session(self.current_user)
+            self.sessions.mark_dirty(self.current_user)
             
     def run(self):
         """Main CLI loop."""
+        init_db()
         self.clear_screen()
         self.print_header()
         print("Welcome to the Health & Wellness Planner Agent!")
@@ -366,7 +350,7 @@ class HealthAgentCLI:
                     else:
                         # Show recent conversation if any
                         print("\n💬 Recent conversation:")
-                        recent = self.current_user.conversation_history[-10:]  # Last 10 messages
+                        recent = self.sessions.recent_messages(self.current_user.uid, 10)  # Last 10 messages
                         for msg in recent:
                             role = "You" if msg["role"] == "user" else "Agent"
                             print(f"{role}: {msg['content']}")
@@ -392,8 +376,8 @@ class HealthAgentCLI:
                     elif user_input.lower() == "clear":
                         self.clear_conversation()
                     elif user_input.lower() == "logout":
+                        self.sessions.evict(self.current_user.uid)
                         self.current_user = None
-                        self.agent = None
                         print("✅ Logged out successfully!")
                     else:
                         # Chat with agent
@@ -403,6 +387,9 @@ class HealthAgentCLI:
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
+        # Stop the agent loop and write any sessions still pending before exiting
+        self.orchestrator.close()
+        self.sessions.close()
 
 if __name__ == "__main__":
     cli = HealthAgentCLI()
@@ -13,17 +13,21 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-from Agent import create_health_agent
+from Agent import get_health_agent
 from Context import UserSessionContext
-from agents import Runner
-from Database import init_db, save_session, load_session
+import Async_Database as async_db
 from Orchestrator import update_context_after_tool
+from Prompt_Builder import build_agent_input
+from Streaming import stream_agent
+from datetime import datetime
 
 class GuaranteedHealthAgentCLI:
     def __init__(self):
-        self.agent = create_health_agent()
-        self.user_context = load_session(1) or UserSessionContext(name="User", uid=1)
+        self.agent = get_health_agent()
+        # Replaced by the stored session once the event loop is running
+        self.user_context = UserSessionContext(name="User", uid=1)
         self.conversation_history = []
+        self.ttft_samples = []  # Time to first token per turn
         
     def print_banner(self):
         """Print the application banner."""
@@ -64,64 +68,54 @@ class GuaranteedHealthAgentCLI:
         if self.user_context.injury_notes:
             print(f"  Injury: {self.user_context.injury_notes}")
         if self.user_context.meal_plan:
-            print(f"  Meal Plan: {len(self.user_context.meal_plan)} days")
+            print(f"  Meal Plan: {len(self.user_context.meal_plan.day_plans)} days")
         if self.user_context.workout_plan:
             print(f"  Workout Plan: Available")
         if self.user_context.progress_logs:
             print(f"  Progress Logs: {len(self.user_context.progress_logs)} entries")
             
     async def chat_with_agent(self, user_input: str) -> str:
-        """Chat with the agent using non-streaming approach for reliability."""
+        """Chat with the agent, printing the answer as it streams in."""
         try:
             print("🤖 Agent is thinking...")
             
-            # Use non-streaming approach for reliability
-            result = await Runner.run(
-                starting_agent=self.agent,
-                input=user_input,
-                context=self.user_context
-            )
+            self.user_context.conversation_history.append({
+                "role": "user",
+                "content": user_input,
+                "timestamp": datetime.now().isoformat()
+            })
             
-            # Extract the response from the result object
-            response_text = ""
+            print("\n🤖 Agent: ", end="", flush=True)
+            turn = await stream_agent(
+                self.agent,
+                build_agent_input(self.user_context, user_input),
+                self.user_context
+            )
+            response_text = turn["text"]
             
-            # Get response from final_output (most reliable)
-            if hasattr(result, 'final_output') and result.final_output:
-                response_text = str(result.final_output)
-            # Fallback to other attributes
-            elif hasattr(result, 'output') and result.output:
-                response_text = str(result.output)
-            elif hasattr(result, 'response') and result.response:
-                response_text = str(result.response)
-            elif hasattr(result, 'message') and result.message:
-                response_text = str(result.message)
-            elif hasattr(result, 'content') and result.content:
-                response_text = str(result.content)
-            elif hasattr(result, 'text') and result.text:
-                response_text = str(result.text)
+            if turn["ttft"] is not None:
+                self.ttft_samples.append(turn["ttft"])
+                print(f"\n   ⏱️ first token {turn['ttft']:.2f}s, total {turn['seconds']:.2f}s")
             else:
-                # Try to get any string from the result object
-                for attr_name in dir(result):
-                    if not attr_name.startswith('_'):
-                        try:
-                            attr_value = getattr(result, attr_name)
-                            if isinstance(attr_value, str) and len(attr_value) > 20:
-                                response_text = attr_value
-                                break
-                        except:
-                            continue
+                # Nothing was streamed (e.g. tool-only turn), print the final text
+                if not response_text:
+                    response_text = "I understand your request. Let me help you with that."
+                print(response_text)
             
-            # Final fallback
-            if not response_text.strip():
-                response_text = "I understand your request. Let me help you with that."
+            self.user_context.conversation_history.append({
+                "role": "assistant",
+                "content": response_text,
+                "timestamp": datetime.now().isoformat()
+            })
+            await async_db.save_session(self.user_context)
             
-            return response_text.strip()
+            return response_text
             
         except Exception as e:
-            print(f"[ERROR] Exception in chat_with_agent: {e}")
+            print(f"\n[ERROR] Exception in chat_with_agent: {e}")
             return f"Error: {e}"
     
-    def handle_command(self, command: str) -> bool:
+    async def handle_command(self, command: str) -> bool:
         """Handle special commands. Returns True if command was handled."""
         parts = command.strip().split(' ', 1)
         cmd = parts[0].lower()
@@ -136,7 +130,7 @@ class GuaranteedHealthAgentCLI:
         elif cmd == 'goal':
             if args:
                 self.user_context.goal = {"description": args}
-                save_session(self.user_context)
+                await async_db.save_session(self.user_context)
                 print(f"✅ Goal set: {args}")
             else:
                 print("❌ Please provide a goal description")
@@ -144,7 +138,7 @@ class GuaranteedHealthAgentCLI:
         elif cmd == 'diet':
             if args:
                 self.user_context.diet_preferences = args
-                save_session(self.user_context)
+                await async_db.save_session(self.user_context)
                 print(f"✅ Diet preferences set: {args}")
             else:
                 print("❌ Please provide dietary preferences")
@@ -152,7 +146,7 @@ class GuaranteedHealthAgentCLI:
         elif cmd == 'injury':
             if args:
                 self.user_context.injury_notes = args
-                save_session(self.user_context)
+                await async_db.save_session(self.user_context)
                 print(f"✅ Injury notes added: {args}")
             else:
                 print("❌ Please provide injury notes")
@@ -160,7 +154,7 @@ class GuaranteedHealthAgentCLI:
         elif cmd == 'progress':
             if args:
                 self.user_context.progress_logs.append({"input": "progress", "result": {"update": args}})
-                save_session(self.user_context)
+                await async_db.save_session(self.user_context)
                 print(f"✅ Progress logged: {args}")
             else:
                 print("❌ Please provide a progress update")
@@ -179,8 +173,9 @@ class GuaranteedHealthAgentCLI:
     
     async def run(self):
         """Run the CLI application."""
-        # Initialize database
-        init_db()
+        # Initialize database and load the stored session off the event loop
+        await async_db.init_db()
+        self.user_context = await async_db.load_session(1) or self.user_context
         
         # Print banner
         self.print_banner()
@@ -197,7 +192,7 @@ class GuaranteedHealthAgentCLI:
                 self.conversation_history.append(("user", user_input))
                 
                 # Check if it's a special command
-                if self.handle_command(user_input):
+                if await self.handle_command(user_input):
                     continue
                 
                 # Chat with agent
@@ -206,9 +201,6 @@ class GuaranteedHealthAgentCLI:
                 # Add response to history
                 self.conversation_history.append(("assistant", response))
                 
-                # Print response
-                print(f"\n🤖 Agent: {response}")
-                
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye! Your progress has been saved.")
                 break
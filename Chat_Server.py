@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Health & Wellness Planner Agent - multi-user chat server
+
+A small asyncio HTTP front end (stdlib only) that serves many users from
+one process:
+
+    POST /chat    {"uid": 1, "message": "..."} -> {"uid": 1, "response": "..."}
+    GET  /health  -> {"status": "ok", "in_flight": 0}
+
+Turns for different users run concurrently, turns for the same user run in
+arrival order, and at most MAX_CONCURRENT_TURNS model calls are in flight.
+SIGINT/SIGTERM stops accepting connections, waits for running turns and
+flushes pending sessions before exiting.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import Async_Database as async_db
+from Orchestrator import HealthOrchestrator
+
+MAX_CONCURRENT_TURNS = int(os.getenv("HEALTH_SERVER_MAX_TURNS", "32"))
+MAX_BODY_BYTES = 64 * 1024
+DRAIN_TIMEOUT = 60.0  # Seconds to wait for running turns on shutdown
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+class ChatServer:
+    def __init__(self, orchestrator: HealthOrchestrator | None = None,
+                 max_concurrent_turns: int = MAX_CONCURRENT_TURNS):
+        self.orchestrator = orchestrator or HealthOrchestrator()
+        self.max_concurrent_turns = max_concurrent_turns
+        self._turn_slots: asyncio.Semaphore | None = None
+        self._user_locks: dict[int, asyncio.Lock] = {}
+        self._lock_waiters: dict[int, int] = {}
+        self._in_flight = 0
+        self._idle: asyncio.Event | None = None
+        self._draining = False
+
+    async def handle_turn(self, uid: int, message: str) -> str:
+        """Run one turn, ordered per user and bounded globally."""
+        lock = self._user_locks.setdefault(uid, asyncio.Lock())
+        self._lock_waiters[uid] = self._lock_waiters.get(uid, 0) + 1
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            # Take the user's lock first so queued turns of one user don't hold global slots
+            async with lock:
+                async with self._turn_slots:
+                    return await self.orchestrator.run_turn(uid, message)
+        finally:
+            self._lock_waiters[uid] -= 1
+            if not self._lock_waiters[uid]:
+                del self._lock_waiters[uid]
+                del self._user_locks[uid]
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY_BYTES:
+            return method, path, None
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    async def _route(self, method: str, path: str, body: bytes | None) -> tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "draining" if self._draining else "ok", "in_flight": self._in_flight}
+        if path != "/chat":
+            return 404, {"error": "Not found"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        if body is None:
+            return 413, {"error": "Request body too large"}
+        if self._draining:
+            return 503, {"error": "Server is shutting down"}
+        try:
+            payload = json.loads(body or b"{}")
+            uid = int(payload["uid"])
+            message = str(payload["message"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": "Expected JSON body with 'uid' and 'message'"}
+        if not message:
+            return 400, {"error": "Message is empty"}
+        try:
+            response = await self.handle_turn(uid, message)
+        except ValueError as e:
+            return 404, {"error": str(e)}
+        except Exception as e:
+            print(f"❌ Turn failed for user {uid}: {e}")
+            return 500, {"error": "Agent turn failed"}
+        return 200, {"uid": uid, "response": response}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, payload = 400, {"error": "Malformed request"}
+            else:
+                status, payload = await self._route(method, path.split("?", 1)[0], body)
+            data = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        """Serve until SIGINT/SIGTERM, then drain running turns and flush sessions."""
+        self._turn_slots = asyncio.Semaphore(self.max_concurrent_turns)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        await async_db.init_db()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass  # Windows: rely on KeyboardInterrupt
+
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"💪 Health agent chat server listening on http://{host}:{port}")
+        print(f"   Max concurrent turns: {self.max_concurrent_turns}")
+        async with server:
+            await stop.wait()
+            print("\n🛑 Shutting down: draining running turns...")
+            self._draining = True
+            server.close()
+            try:
+                await asyncio.wait_for(self._idle.wait(), DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"⚠️ {self._in_flight} turns still running after {DRAIN_TIMEOUT:.0f}s")
+        self.orchestrator.sessions.flush()
+        self.orchestrator.close()
+        print("👋 Sessions saved. Goodbye!")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the health agent to many users over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-turns", type=int, default=MAX_CONCURRENT_TURNS, help="concurrent agent turns")
+    args = parser.parse_args()
+    try:
+        asyncio.run(ChatServer(max_concurrent_turns=args.max_turns).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"❌ Failed to start server: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
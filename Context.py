@@ -1,6 +1,27 @@
-from typing import Optional, List, Dict
-from pydantic import BaseModel
+import threading
+from typing import Any, Optional, List, Dict
+from pydantic import BaseModel, PrivateAttr
 from datetime import datetime
+from Plan_Types import MealPlan, WorkoutPlan
+
+class HistoryLock:
+    """Re-entrant lock for a session's history; copies and unpickled sessions get a fresh one."""
+    __slots__ = ("_lock",)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self._lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self._lock.__exit__(*exc)
+
+    def __deepcopy__(self, memo):
+        return HistoryLock()
+
+    def __reduce__(self):
+        return (HistoryLock, ())
 
 class UserSessionContext(BaseModel):
     name: str
@@ -8,11 +29,24 @@ class UserSessionContext(BaseModel):
     email: Optional[str] = None
     goal: Optional[dict] = None
     diet_preferences: Optional[str] = None
-    workout_plan: Optional[dict] = None
-    meal_plan: Optional[List[str]] = None
+    # Structured plans; lists/dicts of day strings from older sessions are parsed on load
+    workout_plan: Optional[WorkoutPlan] = None
+    meal_plan: Optional[MealPlan] = None
     injury_notes: Optional[str] = None
     handoff_logs: List[str] = []
-    progress_logs: List[Dict[str, str]] = []
+    # Tool results are stored as returned (progress_tracker/checkin_scheduler dicts)
+    progress_logs: List[Dict[str, Any]] = []
     conversation_history: List[Dict[str, str]] = []
     created_at: Optional[str] = None
-    last_updated: Optional[str] = None 
\ No newline at end of file
+    last_updated: Optional[str] = None
+    # Rolling summary of turns older than the prompt window, and how many messages it covers
+    history_summary: Optional[str] = None
+    summary_cursor: int = 0
+
+    # Number of conversation_history entries already stored in the messages table
+    _persisted_messages: int = PrivateAttr(default=0)
+    # Number of stored messages older than conversation_history[0]
+    _history_offset: int = PrivateAttr(default=0)
+    # Held while conversation_history and the two counters above change together
+    # (trimming on the session flusher) or are read together (prompt building)
+    _history_lock: HistoryLock = PrivateAttr(default_factory=HistoryLock) 
\ No newline at end of file
@@ -1,76 +1,322 @@
 import sqlite3
+import csv
 import json
+import queue
+import time
+import threading
+from contextlib import contextmanager
 from Context import UserSessionContext
+from Session_Codec import encode_payload, decode_payload, CODEC_ZLIB_JSON
 from datetime import datetime
 import os
 
 DB_PATH = "user_sessions.db"
 
-# Ensure table exists
-def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        # Check if sessions table exists and has the new columns
+# Connection pool settings
+POOL_SIZE = int(os.getenv("HEALTH_DB_POOL_SIZE", "4"))
+STATEMENT_CACHE_SIZE = 128
+CHECKPOINT_INTERVAL = 1000  # Writes between passive WAL checkpoints
+
+# Messages kept in conversation_history (loaded by load_session, trimmed after saves)
+HISTORY_WINDOW = 50
+
+# Older messages move into compressed archive segments of this many messages
+ARCHIVE_SEGMENT_SIZE = 200
+
+# Messages fetched per query by iter_history
+HISTORY_PAGE_SIZE = 50
+
+# Fields stored in the sessions blob (conversation history lives in messages)
+SESSION_EXCLUDE = {"conversation_history"}
+
+# Users inserted per transaction by create_users_bulk
+BULK_CHUNK_SIZE = 10000
+
+# Rows fetched per query by iter_users
+USER_PAGE_SIZE = 100
+
+# Pragma profile applied once to every pooled connection
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 30000),
+    ("cache_size", -16000),        # 16 MB page cache
+    ("mmap_size", 268435456),      # 256 MB memory-mapped I/O
+    ("temp_store", "MEMORY"),
+)
+
+class ConnectionPool:
+    """Fixed-size pool of tuned SQLite connections shared across threads."""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE, checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.checkpoint_interval = checkpoint_interval
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.schema_ready = False  # Set by init_db once migrations are current
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30.0,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
         try:
-            conn.execute("SELECT name, email, created_at, last_updated FROM sessions LIMIT 1")
-        except sqlite3.OperationalError:
-            # Table exists but doesn't have new columns, recreate it
-            conn.execute("DROP TABLE IF EXISTS sessions")
-            conn.execute("""
-                CREATE TABLE sessions (
-                    uid INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    email TEXT,
-                    data TEXT NOT NULL,
-                    created_at TEXT,
-                    last_updated TEXT
-                )
-            """)
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
         else:
-            # Table exists with new columns, create if not exists
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    uid INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    email TEXT,
-                    data TEXT NOT NULL,
-                    created_at TEXT,
-                    last_updated TEXT
-                )
-            """)
-        
-        # Create users table for registration
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                uid INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                created_at TEXT,
-                last_login TEXT
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, write: bool = False):
+        """Borrow a connection; the block runs as one transaction."""
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+        if write:
+            self._note_write()
+
+    def _note_write(self):
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self.checkpoint_interval
+            if due:
+                self._writes = 0
+        if due:
+            self.checkpoint()
+
+    def checkpoint(self, mode: str = "PASSIVE"):
+        """Run a WAL checkpoint so the log does not grow without bound."""
+        conn = self._acquire()
+        try:
+            return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close all idle connections; borrowed ones close when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it for the current DB_PATH."""
+    global _pool
+    pool = _pool
+    if pool is None or pool.db_path != DB_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.db_path != DB_PATH:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(DB_PATH, POOL_SIZE)
+            pool = _pool
+    return pool
+
+def close_pool():
+    """Close pooled connections (e.g. before deleting the database file)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+# Schema migrations, applied in order and recorded in PRAGMA user_version
+def _table_columns(conn: sqlite3.Connection, table: str) -> list:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: tuple):
+    existing = _table_columns(conn, table)
+    for name, declaration in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+def _migrate_base_tables(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            uid INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT,
+            data TEXT NOT NULL,
+            created_at TEXT,
+            last_updated TEXT
+        )
+    """)
+    # Sessions tables from before user management lack these columns
+    _add_missing_columns(conn, "sessions", (
+        ("name", "TEXT NOT NULL DEFAULT ''"),
+        ("email", "TEXT"),
+        ("created_at", "TEXT"),
+        ("last_updated", "TEXT"),
+    ))
+    # Create users table for registration
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            uid INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE,
+            password_hash TEXT,
+            created_at TEXT,
+            last_login TEXT
+        )
+    """)
+
+def _migrate_messages(conn: sqlite3.Connection):
+    # Append-only conversation log, one row per message
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            uid INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TEXT,
+            PRIMARY KEY (uid, seq)
+        )
+    """)
+
+def _migrate_user_indexes(conn: sqlite3.Connection):
+    # Prefix searches on name/email (email is covered by its UNIQUE index)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users (name, uid)")
+
+def _migrate_session_codec(conn: sqlite3.Connection):
+    _add_missing_columns(conn, "sessions", (("codec", "INTEGER NOT NULL DEFAULT 0"),))
+
+def _migrate_message_segments(conn: sqlite3.Connection):
+    # Cold tier: archived runs of messages stored as one compressed payload
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS message_segments (
+            uid INTEGER NOT NULL,
+            first_seq INTEGER NOT NULL,
+            last_seq INTEGER NOT NULL,
+            codec INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (uid, first_seq)
+        )
+    """)
+
+def _migrate_response_cache(conn: sqlite3.Connection):
+    # Cached model responses keyed by user, conversation and prompt, see Response_Cache.py
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache (last_used)")
+
+def _migrate_legacy_history(conn: sqlite3.Connection):
+    # Older rows kept conversation history inside the session blob; move it to
+    # the messages table once here so load_session never has to write
+    uids = [row[0] for row in conn.execute("SELECT uid FROM sessions")]
+    for uid in uids:
+        codec, data = conn.execute("SELECT codec, data FROM sessions WHERE uid = ?", (uid,)).fetchone()
+        payload = json.loads(decode_payload(codec, data))
+        history = payload.pop("conversation_history", None)
+        if history is None:
+            continue
+        if history:
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE uid = ?", (uid,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO messages (uid, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (uid, next_seq + i, msg.get("role", "unknown"), msg.get("content", ""), msg.get("timestamp"))
+                    for i, msg in enumerate(history)
+                ]
             )
-        """)
+            _archive_old_messages(conn, uid)
+        codec, data = encode_payload(json.dumps(payload))
+        conn.execute("UPDATE sessions SET data = ?, codec = ? WHERE uid = ?", (data, codec, uid))
+
+MIGRATIONS = [
+    (1, _migrate_base_tables),
+    (2, _migrate_messages),
+    (3, _migrate_user_indexes),
+    (4, _migrate_session_codec),
+    (5, _migrate_message_segments),
+    (6, _migrate_response_cache),
+    (7, _migrate_legacy_history),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def init_db():
+    """Bring the schema up to SCHEMA_VERSION; a no-op once it is current."""
+    pool = get_pool()
+    if pool.schema_ready:
+        return
+    with pool.connection() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        with pool.connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Re-read under the write lock in case another process migrated first
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, migrate in MIGRATIONS:
+                if target > version:
+                    migrate(conn)
+                    conn.execute(f"PRAGMA user_version = {target}")
+    pool.schema_ready = True
 
 def create_user(name: str, email: str = None, password_hash: str = None) -> int:
     """Create a new user and return their UID."""
     try:
-        with sqlite3.connect(DB_PATH, timeout=30.0) as conn:
-            # Enable WAL mode to prevent database locking
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA busy_timeout=30000")
-            
+        with get_pool().connection(write=True) as conn:
             now = datetime.now().isoformat()
             
-            # Check if user already exists
-            if email:
-                existing = conn.execute("SELECT uid FROM users WHERE email = ?", (email,)).fetchone()
-                if existing:
-                    raise ValueError(f"User with email {email} already exists")
-            
-            cursor = conn.execute(
-                "INSERT INTO users (name, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
-                (name, email, password_hash, now)
-            )
+            # The UNIQUE email constraint rejects duplicates
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO users (name, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+                    (name, email, password_hash, now)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"User with email {email} already exists")
             uid = cursor.lastrowid
             
             # Create initial session context
@@ -84,22 +330,91 @@ def create_user(name: str, email: str = None, password_hash: str = None) -> int:
             
             # Save session context in the same transaction
             context.last_updated = now
-            data = context.model_dump_json()
+            codec, data = _encode_session(context)
             conn.execute("""
-                INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (uid, name, email, data, now, now))
+                INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated, codec) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (uid, name, email, data, now, now, codec))
             
-            conn.commit()
             return uid
             
     except Exception as e:
         print(f"Database error: {e}")
         raise
 
+def iter_user_records(path: str):
+    """Stream user records from a CSV (with a header row) or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def _insert_user_chunk(conn: sqlite3.Connection, rows: list) -> int:
+    """Insert one chunk of users plus their initial sessions; returns users inserted."""
+    now = datetime.now().isoformat()
+    conn.execute("BEGIN IMMEDIATE")
+    last_uid = conn.execute("SELECT COALESCE(MAX(uid), 0) FROM users").fetchone()[0]
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (name, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+        [(name, email, password_hash, now) for name, email, password_hash in rows]
+    )
+    # AUTOINCREMENT uids only grow, so rows above last_uid are exactly this chunk's inserts
+    created = conn.execute(
+        "SELECT uid, name, email FROM users WHERE uid > ? ORDER BY uid", (last_uid,)
+    ).fetchall()
+    session_rows = []
+    for uid, name, email in created:
+        context = UserSessionContext(name=name, uid=uid, email=email, created_at=now, last_updated=now)
+        codec, data = _encode_session(context)
+        session_rows.append((uid, name, email, data, now, now, codec))
+    conn.executemany("""
+        INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated, codec)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, session_rows)
+    return len(created)
+
+def create_users_bulk(records, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """
+    Create many users from an iterable of dicts (name, email, password or password_hash).
+    Records are inserted in chunked transactions; duplicate emails are skipped.
+    Returns counts and throughput.
+    """
+    start = time.perf_counter()
+    stats = {"inserted": 0, "duplicates": 0, "invalid": 0}
+    pool = get_pool()
+
+    def flush(rows):
+        with pool.connection(write=True) as conn:
+            inserted = _insert_user_chunk(conn, rows)
+        stats["inserted"] += inserted
+        stats["duplicates"] += len(rows) - inserted
+
+    rows = []
+    for record in records:
+        name = (record.get("name") or "").strip()
+        if not name:
+            stats["invalid"] += 1
+            continue
+        email = (record.get("email") or "").strip() or None
+        password_hash = record.get("password_hash") or record.get("password")
+        rows.append((name, email, password_hash))
+        if len(rows) >= chunk_size:
+            flush(rows)
+            rows = []
+    if rows:
+        flush(rows)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["users_per_sec"] = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
 def get_user_by_email(email: str) -> dict | None:
     """Get user by email."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_pool().connection() as conn:
         cur = conn.execute("SELECT * FROM users WHERE email = ?", (email,))
         row = cur.fetchone()
         if row:
@@ -115,7 +430,7 @@ def get_user_by_email(email: str) -> dict | None:
 
 def get_user_by_uid(uid: int) -> dict | None:
     """Get user by UID."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_pool().connection() as conn:
         cur = conn.execute("SELECT * FROM users WHERE uid = ?", (uid,))
         row = cur.fetchone()
         if row:
@@ -131,33 +446,265 @@ def get_user_by_uid(uid: int) -> dict | None:
 
 def update_last_login(uid: int):
     """Update user's last login time."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_pool().connection(write=True) as conn:
         now = datetime.now().isoformat()
         conn.execute("UPDATE users SET last_login = ? WHERE uid = ?", (now, uid))
-        conn.commit()
+
+def _append_messages(conn: sqlite3.Connection, context: UserSessionContext) -> int:
+    """
+    Insert conversation_history entries that are not in the messages table
+    yet. Returns the new persisted count as an absolute message index;
+    callers record it on the context only once the transaction has committed.
+    """
+    with context._history_lock:
+        history = context.conversation_history
+        end = len(history)  # Snapshot: messages appended meanwhile go out next save
+        # A count past the end means history was truncated in memory; nothing new to append
+        pending = history[min(context._persisted_messages, end):end]
+        persisted = context._history_offset + end
+    if not pending:
+        return persisted
+    next_seq = conn.execute(
+        "SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE uid = ?", (context.uid,)
+    ).fetchone()[0]
+    conn.executemany(
+        "INSERT INTO messages (uid, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+        [
+            (context.uid, next_seq + i, msg.get("role", "unknown"), msg.get("content", ""), msg.get("timestamp"))
+            for i, msg in enumerate(pending)
+        ]
+    )
+    _archive_old_messages(conn, context.uid)
+    return persisted
+
+def _archive_old_messages(conn: sqlite3.Connection, uid: int):
+    """Move the oldest messages into compressed segments, keeping HISTORY_WINDOW rows or more."""
+    rows = conn.execute("SELECT COUNT(*) FROM messages WHERE uid = ?", (uid,)).fetchone()[0]
+    while rows >= HISTORY_WINDOW + ARCHIVE_SEGMENT_SIZE:
+        batch = conn.execute(
+            "SELECT seq, role, content, timestamp FROM messages WHERE uid = ? ORDER BY seq LIMIT ?",
+            (uid, ARCHIVE_SEGMENT_SIZE)
+        ).fetchall()
+        codec, data = encode_payload(json.dumps(batch), CODEC_ZLIB_JSON)
+        conn.execute(
+            "INSERT INTO message_segments (uid, first_seq, last_seq, codec, data) VALUES (?, ?, ?, ?, ?)",
+            (uid, batch[0][0], batch[-1][0], codec, data)
+        )
+        conn.execute("DELETE FROM messages WHERE uid = ? AND seq <= ?", (uid, batch[-1][0]))
+        rows -= len(batch)
+
+def _mark_persisted(context: UserSessionContext, persisted: int):
+    """
+    Record a committed save (absolute index from _append_messages), then trim
+    the in-memory history. Runs on the saving thread, so it holds the
+    session's history lock against prompt building on the chat loop.
+    """
+    with context._history_lock:
+        context._persisted_messages = min(persisted - context._history_offset, len(context.conversation_history))
+        _trim_history(context)
+
+def _trim_history(context: UserSessionContext):
+    """Drop persisted messages beyond the hot window from memory."""
+    with context._history_lock:
+        excess = context._persisted_messages - HISTORY_WINDOW
+        if excess > 0:
+            del context.conversation_history[:excess]
+            context._persisted_messages -= excess
+            context._history_offset += excess
+
+def _message(role: str, content: str, timestamp: str | None) -> dict:
+    msg = {"role": role, "content": content}
+    if timestamp:
+        msg["timestamp"] = timestamp
+    return msg
+
+def _read_segment(codec: int, data: bytes) -> list:
+    """Decode an archive segment into [seq, role, content, timestamp] rows."""
+    return json.loads(decode_payload(codec, data))
+
+def _read_messages(conn: sqlite3.Connection, uid: int, limit: int | None) -> list:
+    """Read the last `limit` recent messages, or the full history if None, in chronological order."""
+    if limit is None:
+        rows = []
+        for codec, data in conn.execute(
+            "SELECT codec, data FROM message_segments WHERE uid = ? ORDER BY first_seq", (uid,)
+        ):
+            rows += [row[1:] for row in _read_segment(codec, data)]
+        rows += conn.execute(
+            "SELECT role, content, timestamp FROM messages WHERE uid = ? ORDER BY seq", (uid,)
+        ).fetchall()
+    else:
+        cur = conn.execute(
+            "SELECT role, content, timestamp FROM messages WHERE uid = ? ORDER BY seq DESC LIMIT ?",
+            (uid, limit)
+        )
+        rows = cur.fetchall()[::-1]
+    return [_message(role, content, timestamp) for role, content, timestamp in rows]
+
+def iter_history(uid: int, before: int | None = None, page_size: int = HISTORY_PAGE_SIZE):
+    """
+    Yield a user's messages newest first, each with its "seq", starting below `before`.
+    Recent messages are paged from the messages table, then archive segments are
+    decoded one at a time, so only one page or segment is in memory at once.
+    """
+    before = before if before is not None else float("inf")
+    pool = get_pool()
+    while True:
+        with pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, role, content, timestamp FROM messages WHERE uid = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (uid, before, page_size)
+            ).fetchall()
+        for seq, role, content, timestamp in rows:
+            yield {"seq": seq, **_message(role, content, timestamp)}
+        if rows:
+            before = rows[-1][0]
+        if len(rows) < page_size:
+            break
+    while True:
+        with pool.connection() as conn:
+            segment = conn.execute(
+                "SELECT codec, data FROM message_segments WHERE uid = ? AND first_seq < ? "
+                "ORDER BY first_seq DESC LIMIT 1",
+                (uid, before)
+            ).fetchone()
+        if segment is None:
+            return
+        rows = _read_segment(*segment)
+        for seq, role, content, timestamp in reversed(rows):
+            if seq < before:
+                yield {"seq": seq, **_message(role, content, timestamp)}
+        before = rows[0][0]
+
+def _encode_session(context: UserSessionContext) -> tuple:
+    """Serialize a context for the sessions table; returns (codec, data)."""
+    return encode_payload(context.model_dump_json(exclude=SESSION_EXCLUDE))
+
+def _write_session(conn: sqlite3.Connection, context: UserSessionContext) -> int:
+    context.last_updated = datetime.now().isoformat()
+    codec, data = _encode_session(context)
+    conn.execute("""
+        INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated, codec) 
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (context.uid, context.name, context.email, data, context.created_at, context.last_updated, codec))
+    return _append_messages(conn, context)
 
 def save_session(context: UserSessionContext):
-    """Save user session context."""
-    with sqlite3.connect(DB_PATH) as conn:
-        context.last_updated = datetime.now().isoformat()
-        data = context.model_dump_json()
-        conn.execute("""
-            INSERT OR REPLACE INTO sessions (uid, name, email, data, created_at, last_updated) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (context.uid, context.name, context.email, data, context.created_at, context.last_updated))
-        conn.commit()
-
-def load_session(uid: int) -> UserSessionContext | None:
-    """Load user session context."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.execute("SELECT data FROM sessions WHERE uid = ?", (uid,))
+    """Save user session context and append any new messages."""
+    with get_pool().connection(write=True) as conn:
+        persisted = _write_session(conn, context)
+    _mark_persisted(context, persisted)
+
+def save_sessions(contexts: list):
+    """Save several session contexts in a single transaction."""
+    if not contexts:
+        return
+    with get_pool().connection(write=True) as conn:
+        persisted = [_write_session(conn, context) for context in contexts]
+    # Only after the commit: a rolled-back batch is retried from the same messages
+    for context, count in zip(contexts, persisted):
+        _mark_persisted(context, count)
+
+def load_session(uid: int, history_limit: int | None = HISTORY_WINDOW) -> UserSessionContext | None:
+    """Load user session context with the last `history_limit` messages (read-only)."""
+    with get_pool().connection() as conn:
+        cur = conn.execute("SELECT data, codec FROM sessions WHERE uid = ?", (uid,))
         row = cur.fetchone()
-        if row:
-            return UserSessionContext.model_validate_json(row[0])
-        return None
+        if not row:
+            return None
+        context = UserSessionContext.model_validate_json(decode_payload(row[1], row[0]))
+        context.conversation_history = _read_messages(conn, uid, history_limit)
+        context._persisted_messages = len(context.conversation_history)
+        context._history_offset = _count_messages(conn, uid) - len(context.conversation_history)
+    return context
+
+def get_recent_messages(uid: int, limit: int = 10) -> list:
+    """Get the user's last `limit` messages in chronological order."""
+    with get_pool().connection() as conn:
+        return _read_messages(conn, uid, limit)
+
+def _count_messages(conn: sqlite3.Connection, uid: int) -> int:
+    recent = conn.execute("SELECT COUNT(*) FROM messages WHERE uid = ?", (uid,)).fetchone()[0]
+    archived = conn.execute(
+        "SELECT COALESCE(SUM(last_seq - first_seq + 1), 0) FROM message_segments WHERE uid = ?", (uid,)
+    ).fetchone()[0]
+    return recent + archived
+
+def count_messages(uid: int) -> int:
+    """Count all stored messages for a user, archived ones included."""
+    with get_pool().connection() as conn:
+        return _count_messages(conn, uid)
+
+def clear_messages(context: UserSessionContext):
+    """Delete the user's stored messages and empty the in-memory history."""
+    with get_pool().connection(write=True) as conn:
+        conn.execute("DELETE FROM messages WHERE uid = ?", (context.uid,))
+        conn.execute("DELETE FROM message_segments WHERE uid = ?", (context.uid,))
+    with context._history_lock:
+        context.conversation_history = []
+        context._persisted_messages = 0
+        context._history_offset = 0
+    context.history_summary = None
+    context.summary_cursor = 0
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _user_page_query(name_prefix: str | None, email_prefix: str | None, after_key: bool) -> tuple:
+    """
+    SQL for one iter_users page and the column it is ordered by (None for uid).
+    Prefix searches walk the (name, uid) / (email, uid) index in order; later
+    pages resume after the previous page's last (column, uid) pair.
+    """
+    where = ["uid > ?"]
+    for column, prefix in (("name", name_prefix), ("email", email_prefix)):
+        if prefix:
+            # Range predicates let SQLite use the column index
+            where.append(f"{column} >= ? AND {column} < ?")
+    # The name index is (name, uid); email's UNIQUE index carries the rowid (uid)
+    key = "name" if name_prefix else "email" if email_prefix else None
+    if key and after_key:
+        where.append(f"({key}, uid) > (?, ?)")
+    order = f"{key}, uid" if key else "uid"
+    query = (
+        "SELECT uid, name, email, created_at, last_login FROM users "
+        f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?"
+    )
+    return query, key
+
+def iter_users(after_uid: int = 0, limit: int | None = None, name_prefix: str | None = None,
+               email_prefix: str | None = None, page_size: int = USER_PAGE_SIZE):
+    """
+    Yield registered users with uid greater than `after_uid`, fetched lazily
+    with keyset pagination. Users are ordered by uid, or by (name, uid) /
+    (email, uid) when searching by prefix; prefixes are case-sensitive.
+    """
+    filters = []
+    for prefix in (name_prefix, email_prefix):
+        if prefix:
+            filters += [prefix, _prefix_upper_bound(prefix)]
+    first_query, key = _user_page_query(name_prefix, email_prefix, after_key=False)
+    next_query = _user_page_query(name_prefix, email_prefix, after_key=True)[0] if key else first_query
+    query, cursor = first_query, ()
+    key_index = {"name": 1, "email": 2}.get(key)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        with get_pool().connection() as conn:
+            rows = conn.execute(query, (after_uid, *filters, *cursor, size)).fetchall()
+        for row in rows:
+            yield {"uid": row[0], "name": row[1], "email": row[2], "created_at": row[3], "last_login": row[4]}
+        if len(rows) < size:
+            return
+        if key is None:
+            after_uid = rows[-1][0]
+        else:
+            query, cursor = next_query, (rows[-1][key_index], rows[-1][0])
+        if remaining is not None:
+            remaining -= len(rows)
 
 def get_all_users() -> list:
     """Get all registered users."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.execute("SELECT uid, name, email, created_at, last_login FROM users")
-        return [{"uid": row[0], "name": row[1], "email": row[2], "created_at": row[3], "last_login": row[4]} for row in cur.fetchall()] 
\ No newline at end of file
+    return list(iter_users())
\ No newline at end of file
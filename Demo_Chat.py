@@ -5,7 +5,7 @@ Demo script showing the chat interface after login.
 
 from Database import init_db, create_user, get_user_by_email, load_session, save_session
 from Context import UserSessionContext
-from Agent import create_health_agent
+from Agent import get_health_agent
 from Orchestrator import HealthOrchestrator
 from datetime import datetime
 
@@ -35,7 +35,7 @@ def demo_chat_interface():
             return False
         
         # Create agent
-        agent = create_health_agent()
+        agent = get_health_agent()
         orchestrator = HealthOrchestrator()
         
         print(f"\n👤 Logged in as: {context.name}")
@@ -0,0 +1,325 @@
+"""
+Exercise library loaded once from Exercise_Library.json and indexed by bitsets.
+
+Muscle groups, equipment and contraindications are IntFlags on each
+exercise, and every kind, muscle group and contraindication maps to a bitset
+of exercises (bit i set for exercise i). Injury keywords map to a
+Contraindication mask, so the exercises safe for an injury are one AND NOT
+over the library, and adapting a plan is a few bit operations per exercise.
+
+Plans are adapted block by block from their structured fields: each unsafe
+exercise gets one replacement working at least one of the same muscle
+groups for the whole plan, or is dropped with a note when there is none.
+"""
+
+import json
+import os
+import re
+import threading
+from enum import IntFlag
+from typing import NamedTuple, Optional
+
+from Plan_Types import PlannedExercise, WorkoutDay, WorkoutPlan
+
+LIBRARY_PATH = os.getenv("HEALTH_EXERCISE_LIBRARY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Exercise_Library.json"))
+EXERCISE_KINDS = ("cardio", "strength", "core", "mobility")
+INTENSITY_LEVELS = {"low": 1, "moderate": 2, "high": 3}
+FALLBACK_KIND = "mobility"  # Searched when no safe exercise of the same kind exists
+
+class Muscle(IntFlag):
+    CHEST = 1
+    BACK = 2
+    SHOULDERS = 4
+    ARMS = 8
+    CORE = 16
+    LEGS = 32
+    GLUTES = 64
+    FULL_BODY = CHEST | BACK | SHOULDERS | ARMS | CORE | LEGS | GLUTES
+
+class Equipment(IntFlag):
+    DUMBBELLS = 1
+    BARBELL = 2
+    BENCH = 4
+    MACHINE = 8
+    CABLE = 16
+    BANDS = 32
+    MAT = 64
+    PULL_UP_BAR = 128
+    DIP_BARS = 256
+    BIKE = 512
+    ELLIPTICAL = 1024
+    ROWER = 2048
+    POOL = 4096
+    JUMP_ROPE = 8192
+    ARM_ERGOMETER = 16384
+    FOAM_ROLLER = 32768
+    CHAIR = 65536
+
+class Contraindication(IntFlag):
+    KNEE = 1
+    BACK = 2
+    SHOULDER = 4
+    ANKLE = 8
+    WRIST = 16
+    HIP = 32
+    NECK = 64
+    HIGH_IMPACT = 128
+
+# Injury keywords -> what to avoid; the rest of Health_Text.INJURY_KEYWORDS ("pain", "avoid", ...) only qualify them
+INJURY_MASKS = {
+    "knee": Contraindication.KNEE,
+    "back": Contraindication.BACK,
+    "shoulder": Contraindication.SHOULDER,
+    "ankle": Contraindication.ANKLE,
+    "wrist": Contraindication.WRIST,
+    "hip": Contraindication.HIP,
+    "neck": Contraindication.NECK,
+    "surgery": Contraindication.HIGH_IMPACT,
+    "recovery": Contraindication.HIGH_IMPACT,
+    "physical therapy": Contraindication.HIGH_IMPACT,
+}
+# Whole words only ("relationship" has no hip), plurals included; "back" as in
+# "get back into shape" is not a body area
+_ADVERB_BACK = r"(?!\s+(?:to|into|in|on|up|from|home|again)\b)"
+_INJURY_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(
+        re.escape(keyword) + (_ADVERB_BACK if keyword == "back" else "")
+        for keyword in sorted(INJURY_MASKS, key=len, reverse=True)
+    ) + r")(?:e?s)?(?!\w)",
+    re.IGNORECASE,
+)
+
+class Exercise(NamedTuple):
+    id: int
+    name: str
+    kind: str
+    muscles: Muscle
+    equipment: Equipment
+    intensity: int
+    contraindications: Contraindication
+    aliases: tuple
+
+def _flags(flag_type, names) -> IntFlag:
+    value = flag_type(0)
+    for name in names:
+        value |= flag_type[name.upper()]
+    return value
+
+def flag_names(flags: IntFlag) -> list:
+    """Lowercase names of the single flags set in `flags`."""
+    return [flag.name.lower().replace("_", "-") for flag in type(flags) if flag & flags == flag and bin(flag.value).count("1") == 1]
+
+def injury_mask(text: str) -> Contraindication:
+    """Contraindications implied by the injury keywords in free text."""
+    mask = Contraindication(0)
+    for keyword in _INJURY_PATTERN.findall(text or ""):
+        mask |= INJURY_MASKS[keyword.lower()]
+    return mask
+
+def _bits(mask: int):
+    mask = int(mask)  # Plain int arithmetic; IntFlag operators build enum members
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _overlap(a: int, b: int) -> float:
+    """Shared over combined muscle groups, so full-body blocks don't outrank close matches."""
+    a, b = int(a), int(b)
+    return bin(a & b).count("1") / max(bin(a | b).count("1"), 1)
+
+def _cased(name: str, first: bool) -> str:
+    """Capitalize a name starting a list, lowercase it inside one (acronyms such as HIIT stay)."""
+    if first:
+        return name[:1].upper() + name[1:]
+    return name if name[1:2].isupper() else name[:1].lower() + name[1:]
+
+class ExerciseLibrary:
+    def __init__(self, exercises: list):
+        self.exercises = tuple(exercises)
+        self.kind_index: dict[str, int] = {}
+        self.intensity_index: dict[int, int] = {level: 0 for level in INTENSITY_LEVELS.values()}  # At most this intense
+        self.muscle_index: dict[Muscle, int] = {flag: 0 for flag in Muscle}
+        self.contraindication_index: dict[Contraindication, int] = {flag: 0 for flag in Contraindication}
+        self.alias_index: dict[str, Exercise] = {}
+        for exercise in self.exercises:
+            bit = 1 << exercise.id
+            self.kind_index[exercise.kind] = self.kind_index.get(exercise.kind, 0) | bit
+            for level in self.intensity_index:
+                if exercise.intensity <= level:
+                    self.intensity_index[level] |= bit
+            for flag in self.muscle_index:
+                if flag & exercise.muscles:
+                    self.muscle_index[flag] |= bit
+            for flag in self.contraindication_index:
+                if flag & exercise.contraindications:
+                    self.contraindication_index[flag] |= bit
+            for alias in (exercise.name.lower(),) + exercise.aliases:
+                self.alias_index[alias] = exercise
+        self.all_mask = (1 << len(self.exercises)) - 1
+        # One pass over plan text finds every named exercise (longest alias first); lookarounds
+        # instead of \b so aliases ending in punctuation, e.g. "hiit (high-intensity interval training)", match
+        self._alias_pattern = re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(alias) for alias in sorted(self.alias_index, key=len, reverse=True)) + r")(?!\w)",
+            re.IGNORECASE,
+        )
+
+    @classmethod
+    def load(cls, path: str = LIBRARY_PATH) -> "ExerciseLibrary":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([
+            Exercise(
+                id=i,
+                name=item["name"],
+                kind=item["kind"],
+                muscles=_flags(Muscle, item["muscles"]),
+                equipment=_flags(Equipment, item["equipment"]),
+                intensity=INTENSITY_LEVELS[item["intensity"]],
+                contraindications=_flags(Contraindication, item["contraindications"]),
+                aliases=tuple(alias.lower() for alias in item["aliases"]),
+            )
+            for i, item in enumerate(data["exercises"])
+        ])
+
+    def unsafe_mask(self, avoid: Contraindication) -> int:
+        """Bitset of exercises contraindicated by any flag in `avoid`."""
+        mask = 0
+        for bit in _bits(avoid):
+            mask |= self.contraindication_index[1 << bit]  # IntFlag keys hash and compare as ints
+        return mask
+
+    def mask(self, kind: Optional[str] = None, muscles: Muscle = Muscle(0), avoid: Contraindication = Contraindication(0),
+             max_intensity: Optional[int] = None) -> int:
+        """Bitset of exercises of the kind, working any of `muscles`, and safe for `avoid`."""
+        mask = self.kind_index.get(kind, 0) if kind else self.all_mask
+        if muscles:
+            mask &= self.muscles_mask(muscles)
+        mask &= ~self.unsafe_mask(avoid)
+        if max_intensity is not None:
+            mask &= self.intensity_index.get(max_intensity, 0)
+        return mask
+
+    def muscles_mask(self, muscles: Muscle) -> int:
+        mask = 0
+        for bit in _bits(muscles):
+            mask |= self.muscle_index[1 << bit]
+        return mask
+
+    def exercises_in(self, mask: int) -> list:
+        return [self.exercises[i] for i in _bits(mask)]
+
+    def find(self, kind: Optional[str] = None, muscles: Muscle = Muscle(0), avoid: Contraindication = Contraindication(0)) -> list:
+        return self.exercises_in(self.mask(kind, muscles, avoid))
+
+    def lookup(self, name: str) -> Optional[Exercise]:
+        return self.alias_index.get(name.lower())
+
+    def named_in(self, text: str) -> list:
+        """(exercise, wording) for each library exercise named in `text`, in order, without repeats."""
+        found = {}
+        for name in self._alias_pattern.findall(text):
+            exercise = self.alias_index[name.lower()]
+            found.setdefault(exercise.id, (exercise, name))
+        return list(found.values())
+
+    def block_exercises(self, block: PlannedExercise) -> tuple:
+        """
+        (exercises, label exercises) of a plan block. The exercises are those
+        named in the detail, or in the label when the detail names none
+        ("Recovery run - 30 min easy pace"); the label ones may be unsafe too.
+        """
+        label = self.named_in(block.kind)
+        return self.named_in(block.detail) or label, label
+
+    def substitute(self, exercise: Exercise, avoid: Contraindication, taken: int = 0) -> Optional[Exercise]:
+        """
+        Safe replacement for `exercise` working at least one of its muscle
+        groups: same kind, else FALLBACK_KIND; then the largest muscle
+        overlap and the closest intensity. Exercises in `taken` are used only
+        when nothing else fits. None when no safe exercise qualifies.
+        """
+        safe = self.all_mask & ~self.unsafe_mask(avoid) & ~(1 << exercise.id) & self.muscles_mask(exercise.muscles)
+        for kind in (exercise.kind, FALLBACK_KIND):
+            candidates = safe & self.kind_index.get(kind, 0)
+            for pool in (candidates & ~taken, candidates):
+                if pool:
+                    return max(
+                        self.exercises_in(pool),
+                        key=lambda e: (_overlap(e.muscles, exercise.muscles), -abs(e.intensity - exercise.intensity), -e.id),
+                    )
+        return None
+
+    def adapt_plan(self, plan: WorkoutPlan, avoid: Contraindication) -> WorkoutPlan:
+        """
+        Copy of `plan` without exercises contraindicated by `avoid`. Each
+        unsafe exercise gets one replacement for the whole plan, or is
+        dropped when substitute finds none; blocks naming no library exercise
+        can't be checked and are dropped too, rest days aside. Changed blocks
+        are rebuilt from their fields, and the injury areas, swaps and drops
+        are listed on the new plan.
+        """
+        if not avoid:
+            return plan
+        unsafe = self.unsafe_mask(avoid)
+        replacements = {}  # Exercise id -> replacement, or None when dropped
+        notes = {}         # Swap and drop notes, in first-use order
+        day_plans = []
+        for day in plan.day_plans:
+            blocks = []
+            for block in day.exercises:
+                adapted = self._adapt_block(block, avoid, unsafe, replacements, notes)
+                if adapted is not None:
+                    blocks.append(adapted)
+            day_plans.append(WorkoutDay(day.day, tuple(blocks) or (PlannedExercise("Rest day"),)))
+        fields = {name: getattr(plan, name) for name in WorkoutPlan.FIELDS}
+        fields.update(injuries=flag_names(avoid), substitutions=list(notes))
+        return WorkoutPlan(day_plans, **fields)
+
+    def _adapt_block(self, block: PlannedExercise, avoid: Contraindication, unsafe: int, replacements: dict,
+                     notes: dict) -> Optional[PlannedExercise]:
+        named, label_named = self.block_exercises(block)
+        if not named:
+            if block.kind.lower().startswith("rest"):
+                return block
+            notes[f"Dropped {block.render()} (not in the exercise library)"] = None
+            return None
+        if not any(unsafe >> exercise.id & 1 for exercise, _ in named + label_named):
+            return block
+        taken = 0  # Replacements chosen for this block; later ones prefer others
+        kept = {}  # Exercise id -> (exercise, wording)
+        for exercise, wording in named:
+            if unsafe >> exercise.id & 1:
+                if exercise.id not in replacements:
+                    replacement = self.substitute(exercise, avoid, taken)
+                    replacements[exercise.id] = replacement
+                    notes[f"{exercise.name} -> {replacement.name}" if replacement else f"Dropped {exercise.name} (no safe alternative)"] = None
+                exercise = replacements[exercise.id]
+                if exercise is None:
+                    continue
+                taken |= 1 << exercise.id
+                wording = exercise.name
+            kept.setdefault(exercise.id, (exercise, wording))
+        if not kept:
+            return None
+        exercises = list(kept.values())
+        # A label naming an exercise ("Interval training", "Lower body strength (squats, ...)") becomes the kind
+        kind = exercises[0][0].kind.title() if label_named else block.kind
+        detail = ", ".join(_cased(wording, i == 0 and block.minutes is None) for i, (_, wording) in enumerate(exercises))
+        if block.minutes is not None:
+            detail = f"{block.minutes} min {detail}"
+        if block.sets is not None:
+            detail += f" ({block.sets} sets, {block.reps} reps)" if block.reps else f" ({block.sets} sets)"
+        return PlannedExercise(kind, detail, block.minutes, block.sets, block.reps)
+
+_library: Optional[ExerciseLibrary] = None
+_library_lock = threading.Lock()
+
+def get_exercise_library() -> ExerciseLibrary:
+    """The process-wide library, loaded on first use."""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = ExerciseLibrary.load()
+    return _library
@@ -1,7 +1,8 @@
 from typing import TypedDict
 from agents.tool import function_tool
 from Guardrails import validate_goal_input
-import re
+from Tool_Cache import memoize_tool
+from Health_Text import parse_health_text
 
 class GoalAnalysisDict(TypedDict):
     quantity: float
@@ -10,12 +11,14 @@ class GoalAnalysisDict(TypedDict):
     goal_type: str
     difficulty: str
 
+@memoize_tool("analyze_goal", echo={"description": lambda goal_text: goal_text.lower()})
 def analyze_goal(goal_text: str):
     """Analyze and parse a user goal string into structured data as a dict."""
     if not validate_goal_input(goal_text):
         raise ValueError("Invalid goal input format.")
     
-    goal_text = goal_text.lower()
+    features = parse_health_text(goal_text)
+    keywords = features.keywords
     
     # Extract quantity and metric
     quantity = 5.0
@@ -25,47 +28,28 @@ def analyze_goal(goal_text: str):
     difficulty = "moderate"
     
     # Parse weight loss goals
-    if "lose" in goal_text or "weight" in goal_text:
+    weight_goal = False
+    if "lose" in keywords or "weight" in keywords:
         goal_type = "weight_loss"
-        # Extract number and unit
-        weight_match = re.search(r'(\d+(?:\.\d+)?)\s*(kg|pounds?|lbs?|kilos?)', goal_text)
-        if weight_match:
-            quantity = float(weight_match.group(1))
-            unit = weight_match.group(2)
-            if unit in ["pounds", "lbs", "pound"]:
-                metric = "pounds"
-            else:
-                metric = "kg"
-    
+        weight_goal = True
     # Parse muscle gain goals
-    elif "gain" in goal_text or "muscle" in goal_text or "build" in goal_text:
+    elif "gain" in keywords or "muscle" in keywords or "build" in keywords:
         goal_type = "muscle_gain"
-        weight_match = re.search(r'(\d+(?:\.\d+)?)\s*(kg|pounds?|lbs?|kilos?)', goal_text)
-        if weight_match:
-            quantity = float(weight_match.group(1))
-            unit = weight_match.group(2)
-            if unit in ["pounds", "lbs", "pound"]:
-                metric = "pounds"
-            else:
-                metric = "kg"
-    
+        weight_goal = True
     # Parse fitness goals
-    elif "fit" in goal_text or "endurance" in goal_text or "strength" in goal_text:
+    elif "fit" in keywords or "endurance" in keywords or "strength" in keywords:
         goal_type = "fitness"
         quantity = 1.0
         metric = "fitness_level"
     
+    # Weight and muscle goals take the stated amount and unit
+    if weight_goal and features.quantity is not None:
+        quantity = features.quantity
+        metric = "pounds" if features.quantity_unit in ["pounds", "lbs", "pound"] else "kg"
+    
     # Extract duration
-    time_match = re.search(r'(\d+)\s*(weeks?|months?|days?)', goal_text)
-    if time_match:
-        amount = int(time_match.group(1))
-        unit = time_match.group(2)
-        if unit in ["week", "weeks"]:
-            duration = f"{amount} weeks"
-        elif unit in ["month", "months"]:
-            duration = f"{amount} months"
-        elif unit in ["day", "days"]:
-            duration = f"{amount} days"
+    if features.duration_amount is not None:
+        duration = f"{features.duration_amount} {features.duration_unit}s"
     
     # Determine difficulty
     if quantity > 10 or "months" in duration and int(duration.split()[0]) > 3:
@@ -81,7 +65,7 @@ def analyze_goal(goal_text: str):
         "duration": duration,
         "goal_type": goal_type,
         "difficulty": difficulty,
-        "description": goal_text
+        "description": features.text
     }
 
 analyze_goal_tool = function_tool(analyze_goal) 
\ No newline at end of file
@@ -1,84 +1,52 @@
 from pydantic import BaseModel, ValidationError
-from typing import Any
+from typing import Any, NamedTuple
+from functools import lru_cache
+from Health_Text import parse_health_text
+
+GUARDRAIL_CACHE_SIZE = 1024
+MAX_DURATION = {"day": 365, "week": 52, "month": 12}  # More than a year is unrealistic
+MAX_QUANTITY = 50  # Unrealistic weight goal above this
+
+class GuardrailVerdict(NamedTuple):
+    goal: bool
+    diet: bool
+    injury: bool
+    spans: tuple  # (kind, start, end) for every keyword, quantity and duration found
+
+    @property
+    def passed(self) -> bool:
+        return self.goal and self.diet and self.injury
+
+@lru_cache(maxsize=GUARDRAIL_CACHE_SIZE)
+def check_health_input(text: str) -> GuardrailVerdict:
+    """Goal, diet and injury verdicts from one parse of the input."""
+    if not text:
+        return GuardrailVerdict(False, False, False, ())
+    features = parse_health_text(text)
+    goal = features.length >= 3 and "goal" in features.categories
+    if goal and features.quantity is not None and features.quantity > MAX_QUANTITY:
+        goal = False
+    if goal and features.duration_amount is not None and features.duration_amount > MAX_DURATION[features.duration_unit]:
+        goal = False
+    diet = features.length >= 2 and "diet" in features.categories
+    injury = features.length >= 3 and "injury" in features.categories
+    return GuardrailVerdict(goal, diet, injury, features.spans)
 
 def validate_goal_input(goal_text: str) -> bool:
     """Validate goal input format and content."""
-    if not goal_text or len(goal_text.strip()) < 3:
-        return False
-    
-    goal_text = goal_text.lower()
-    
-    # Check for valid goal keywords
-    valid_goal_keywords = [
-        "lose", "gain", "weight", "muscle", "fit", "endurance", "strength",
-        "build", "tone", "slim", "bulk", "cardio", "health", "wellness"
-    ]
-    
-    if not any(keyword in goal_text for keyword in valid_goal_keywords):
-        return False
-    
-    # Check for reasonable quantities and timeframes
-    import re
-    quantity_match = re.search(r'(\d+(?:\.\d+)?)\s*(kg|pounds?|lbs?|kilos?)', goal_text)
-    time_match = re.search(r'(\d+)\s*(weeks?|months?|days?)', goal_text)
-    
-    if quantity_match:
-        quantity = float(quantity_match.group(1))
-        if quantity > 50:  # Unrealistic weight goal
-            return False
-    
-    if time_match:
-        amount = int(time_match.group(1))
-        unit = time_match.group(2)
-        if unit in ["day", "days"] and amount > 365:  # More than a year
-            return False
-        elif unit in ["week", "weeks"] and amount > 52:  # More than a year
-            return False
-        elif unit in ["month", "months"] and amount > 12:  # More than a year
-            return False
-    
-    return True
+    return check_health_input(goal_text).goal
 
 def validate_diet_input(diet_text: str) -> bool:
     """Validate dietary preferences input."""
-    if not diet_text or len(diet_text.strip()) < 2:
-        return False
-    
-    diet_text = diet_text.lower()
-    
-    # Check for valid diet keywords
-    valid_diet_keywords = [
-        "vegetarian", "vegan", "keto", "paleo", "mediterranean", "low-carb",
-        "high-protein", "gluten-free", "dairy-free", "balanced", "healthy"
-    ]
-    
-    if not any(keyword in diet_text for keyword in valid_diet_keywords):
-        return False
-    
-    return True
+    return check_health_input(diet_text).diet
 
 def validate_injury_input(injury_text: str) -> bool:
     """Validate injury-related input."""
-    if not injury_text or len(injury_text.strip()) < 3:
-        return False
-    
-    injury_text = injury_text.lower()
-    
-    # Check for valid injury keywords
-    valid_injury_keywords = [
-        "knee", "back", "shoulder", "ankle", "wrist", "hip", "neck",
-        "pain", "injury", "surgery", "recovery", "physical therapy",
-        "limited", "restricted", "avoid", "careful"
-    ]
-    
-    if not any(keyword in injury_text for keyword in valid_injury_keywords):
-        return False
-    
-    return True
+    return check_health_input(injury_text).injury
 
 def output_guardrail(output: Any, model: BaseModel) -> bool:
     try:
         model.parse_obj(output)
         return True
     except ValidationError:
-        return False 
\ No newline at end of file
+        return False
@@ -0,0 +1,104 @@
+"""
+One-pass parsing of health-related free text.
+
+parse_health_text() lowercases a message once and scans it with a single
+compiled regex for every known keyword, the first weight quantity and the
+first duration. The result is an immutable HealthFeatures record that the
+guardrails and the planning tools share instead of re-parsing the text.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import re
+
+GOAL_KEYWORDS = (
+    "lose", "gain", "weight", "muscle", "fit", "endurance", "strength",
+    "build", "tone", "slim", "bulk", "cardio", "health", "wellness"
+)
+DIET_KEYWORDS = (
+    "vegetarian", "vegan", "keto", "paleo", "mediterranean", "low-carb",
+    "high-protein", "gluten-free", "dairy-free", "balanced", "healthy"
+)
+INJURY_KEYWORDS = (
+    "knee", "back", "shoulder", "ankle", "wrist", "hip", "neck",
+    "pain", "injury", "surgery", "recovery", "physical therapy",
+    "limited", "restricted", "avoid", "careful"
+)
+# Further terms the tools branch on
+TOOL_KEYWORDS = (
+    "lost", "stamina", "power", "pound", "kg", "workout", "exercise", "gym",
+    "run", "meal", "diet", "food", "eat", "energy", "mood", "feel", "sleep"
+)
+KEYWORD_SETS = {"goal": GOAL_KEYWORDS, "diet": DIET_KEYWORDS, "injury": INJURY_KEYWORDS}
+VOCABULARY = frozenset(GOAL_KEYWORDS + DIET_KEYWORDS + INJURY_KEYWORDS + TOOL_KEYWORDS)
+
+# The scan matches only the longest term starting at each position, so a
+# match also stands for every term it contains (e.g. "healthy" holds "health")
+CONTAINED_KEYWORDS = {kw: frozenset(other for other in VOCABULARY if other in kw) for kw in VOCABULARY}
+KEYWORD_CATEGORIES = {
+    kw: frozenset(cat for cat, kws in KEYWORD_SETS.items() if any(other in kw for other in kws))
+    for kw in VOCABULARY
+}
+
+# Zero-width lookahead: one pass finds matches starting at every position
+_HEALTH_TEXT_PATTERN = re.compile(
+    "(?=(?:(?P<keyword>"
+    + "|".join(re.escape(kw) for kw in sorted(VOCABULARY, key=len, reverse=True))
+    + r")|(?P<quantity>(?P<weight>\d+(?:\.\d+)?)\s*(?P<weight_unit>kg|pounds?|lbs?|kilos?))"
+    + r"|(?P<duration>(?P<amount>\d+)\s*(?P<unit>weeks?|months?|days?))))"
+)
+KG_PER_UNIT = {"kg": 1.0, "kilo": 1.0, "kilos": 1.0, "pound": 0.45359237, "pounds": 0.45359237, "lb": 0.45359237, "lbs": 0.45359237}
+DAYS_PER_UNIT = {"day": 1, "week": 7, "month": 30}
+PARSE_CACHE_SIZE = 1024
+
+@dataclass(frozen=True, slots=True)
+class HealthFeatures:
+    text: str                        # Lowercased input
+    length: int                      # Length of the input without surrounding whitespace
+    keywords: frozenset              # Known terms found (substring semantics)
+    categories: frozenset            # Subset of {"goal", "diet", "injury"}
+    quantity: Optional[float]        # First weight quantity as written
+    quantity_unit: Optional[str]     # Its unit as written, e.g. "lbs"
+    quantity_kg: Optional[float]
+    duration_amount: Optional[int]   # First duration as written
+    duration_unit: Optional[str]     # "day", "week" or "month"
+    duration_days: Optional[int]
+    spans: tuple                     # (term, start, end) per keyword, "quantity" or "duration"
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_health_text(text: str) -> HealthFeatures:
+    """Parse a message once into a shared, immutable feature record."""
+    lowered = (text or "").lower()
+    keywords = set()
+    spans = []
+    quantity = quantity_unit = duration_amount = duration_unit = None
+    number_end = 0  # Skip the digit-suffix matches inside a number already seen
+    for match in _HEALTH_TEXT_PATTERN.finditer(lowered):
+        keyword = match.group("keyword")
+        if keyword:
+            keywords |= CONTAINED_KEYWORDS[keyword]
+            spans.append((keyword, match.start(), match.end("keyword")))
+        elif match.start() >= number_end:
+            kind = "quantity" if match.group("quantity") else "duration"
+            number_end = match.end(kind)
+            spans.append((kind, match.start(), number_end))
+            if kind == "quantity" and quantity is None:
+                quantity, quantity_unit = float(match.group("weight")), match.group("weight_unit")
+            elif kind == "duration" and duration_amount is None:
+                duration_amount, duration_unit = int(match.group("amount")), match.group("unit").rstrip("s")
+
+    categories = frozenset().union(*(KEYWORD_CATEGORIES[kw] for kw in keywords))
+    return HealthFeatures(
+        text=lowered,
+        length=len(lowered.strip()),
+        keywords=frozenset(keywords),
+        categories=categories,
+        quantity=quantity,
+        quantity_unit=quantity_unit,
+        quantity_kg=None if quantity is None else round(quantity * KG_PER_UNIT[quantity_unit], 2),
+        duration_amount=duration_amount,
+        duration_unit=duration_unit,
+        duration_days=None if duration_amount is None else duration_amount * DAYS_PER_UNIT[duration_unit],
+        spans=tuple(spans),
+    )
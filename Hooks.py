@@ -1,25 +1,42 @@
+from collections.abc import Mapping
 from agents import RunHooks, AgentHooks
+from Context import UserSessionContext
+from Orchestrator import update_context_after_tool
+
+def _latest_user_message(context: UserSessionContext) -> str:
+    for msg in reversed(context.conversation_history):
+        if msg.get("role") == "user":
+            return msg.get("content", "")
+    return ""
+
+def record_tool_result(run_context, tool, result):
+    """Store a tool's result on the session (goal, plans, progress logs); failed calls return text and are skipped."""
+    context = run_context.context
+    if isinstance(context, UserSessionContext) and isinstance(result, Mapping):
+        update_context_after_tool(tool.name, result, _latest_user_message(context), context)
 
 class HealthRunHooks(RunHooks):
-    def on_agent_start(self, agent, context):
+    async def on_agent_start(self, context, agent):
         print(f"[RunHooks] Agent {agent.name} started.")
-    def on_agent_end(self, agent, context):
+    async def on_agent_end(self, context, agent, output):
         print(f"[RunHooks] Agent {agent.name} ended.")
-    def on_tool_start(self, tool, context):
+    async def on_tool_start(self, context, agent, tool):
         print(f"[RunHooks] Tool {tool.name} started.")
-    def on_tool_end(self, tool, context):
+    async def on_tool_end(self, context, agent, tool, result):
         print(f"[RunHooks] Tool {tool.name} ended.")
-    def on_handoff(self, from_agent, to_agent, context):
+    async def on_handoff(self, context, from_agent, to_agent):
         print(f"[RunHooks] Handoff from {from_agent.name} to {to_agent.name}.")
 
 class HealthAgentHooks(AgentHooks):
-    def on_start(self, agent, context):
+    """Per-agent hooks shared by the health agent and its handoff agents; tool results update the session."""
+    async def on_start(self, context, agent):
         print(f"[AgentHooks] {agent.name} started.")
-    def on_end(self, agent, context):
+    async def on_end(self, context, agent, output):
         print(f"[AgentHooks] {agent.name} ended.")
-    def on_tool_start(self, tool, context):
+    async def on_tool_start(self, context, agent, tool):
         print(f"[AgentHooks] Tool {tool.name} started.")
-    def on_tool_end(self, tool, context):
+    async def on_tool_end(self, context, agent, tool, result):
+        record_tool_result(context, tool, result)
         print(f"[AgentHooks] Tool {tool.name} ended.")
-    def on_handoff(self, from_agent, to_agent, context):
-        print(f"[AgentHooks] Handoff from {from_agent.name} to {to_agent.name}.") 
\ No newline at end of file
+    async def on_handoff(self, context, agent, source):
+        print(f"[AgentHooks] Handoff from {source.name} to {agent.name}.")
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Bulk-import users from a CSV or JSONL file.
+
+CSV files need a header row with name, email and password (or password_hash)
+columns; JSONL files hold one object with the same keys per line.
+"""
+
+import argparse
+import sys
+
+from Database import init_db, create_users_bulk, iter_user_records, BULK_CHUNK_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import users into the session database.")
+    parser.add_argument("path", help="CSV or JSONL file with user records")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="users per transaction")
+    args = parser.parse_args()
+
+    print(f"📥 Importing users from {args.path}...")
+    try:
+        init_db()
+        stats = create_users_bulk(iter_user_records(args.path), chunk_size=args.chunk_size)
+    except Exception as e:
+        print(f"❌ Import failed: {e}")
+        return False
+
+    print(f"✅ Inserted: {stats['inserted']}")
+    print(f"   Duplicate emails skipped: {stats['duplicates']}")
+    print(f"   Invalid records skipped: {stats['invalid']}")
+    print(f"   Time: {stats['seconds']:.2f}s ({stats['users_per_sec']:,.0f} users/sec)")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
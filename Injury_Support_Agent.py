@@ -1,10 +1,11 @@
 from agents import Agent
+from Workout_Recommender import injury_safe_workout_tool
 
 def create_injury_support_agent(handoff_description=None, hooks=None):
     return Agent(
         name="InjurySupportAgent",
-        instructions="You are an injury support agent. Assist users with physical limitations or injury-specific workout plans and advice.",
-        tools=[],
+        instructions="You are an injury support agent. Assist users with physical limitations or injury-specific workout plans and advice. Use injury_safe_workout for a weekly plan that avoids exercises unsafe for their injury, and explain each substitution.",
+        tools=[injury_safe_workout_tool],
         handoff_description=handoff_description,
         hooks=hooks,
     ) 
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Meal catalog loaded once from Meal_Catalog.json and indexed by diet tag.
+
+Every tag and meal slot maps to a bitset (an int with bit i set for meal i),
+so combined constraints such as vegan + gluten-free + high-protein resolve
+with a few integer ANDs instead of scanning the meals.
+"""
+
+import json
+import os
+import threading
+from typing import NamedTuple, Optional
+
+CATALOG_PATH = os.getenv("HEALTH_MEAL_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Meal_Catalog.json"))
+MEAL_SLOTS = ("breakfast", "lunch", "dinner")
+DIET_TAGS = (
+    "vegetarian", "vegan", "keto", "paleo", "mediterranean", "low-carb",
+    "high-protein", "gluten-free", "dairy-free", "balanced"
+)
+# Preferences dropped (in this order) when no meal satisfies every tag; restrictions are never dropped
+SOFT_TAGS = ("balanced", "mediterranean", "low-carb", "high-protein")
+PLAN_DAYS = 7
+
+class Meal(NamedTuple):
+    id: int
+    name: str
+    slot: str
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fat_g: int
+    tags: frozenset
+    ingredients: tuple
+
+class MealCatalog:
+    def __init__(self, meals: list):
+        self.meals = tuple(meals)
+        self.tag_index: dict[str, int] = {}
+        self.slot_index: dict[str, int] = {}
+        for meal in self.meals:
+            bit = 1 << meal.id
+            self.slot_index[meal.slot] = self.slot_index.get(meal.slot, 0) | bit
+            for tag in meal.tags:
+                self.tag_index[tag] = self.tag_index.get(tag, 0) | bit
+        self.all_mask = (1 << len(self.meals)) - 1
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "MealCatalog":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([
+            Meal(
+                id=i,
+                name=item["name"],
+                slot=item["slot"],
+                calories=int(item["calories"]),
+                protein_g=int(item["protein_g"]),
+                carbs_g=int(item["carbs_g"]),
+                fat_g=int(item["fat_g"]),
+                tags=frozenset(item["tags"]),
+                ingredients=tuple(item["ingredients"]),
+            )
+            for i, item in enumerate(data["meals"])
+        ])
+
+    def mask(self, tags=(), slot: Optional[str] = None) -> int:
+        """Bitset of meals carrying every tag (and in the slot, if given)."""
+        mask = self.slot_index.get(slot, 0) if slot else self.all_mask
+        for tag in tags:
+            mask &= self.tag_index.get(tag, 0)
+        return mask
+
+    def meals_in(self, mask: int) -> list:
+        meals = []
+        while mask:
+            low = mask & -mask
+            meals.append(self.meals[low.bit_length() - 1])
+            mask ^= low
+        return meals
+
+    def excluded_mask(self, terms) -> int:
+        """Bitset of meals whose name or an ingredient contains any of the terms."""
+        terms = [term.lower() for term in terms if term]
+        mask = 0
+        for meal in self.meals:
+            text = " | ".join((meal.name.lower(),) + meal.ingredients)
+            if any(term in text for term in terms):
+                mask |= 1 << meal.id
+        return mask
+
+    def slot_choices(self, tags, exclude_mask: int = 0) -> tuple:
+        """
+        Matching meals per slot as ({slot: [Meal, ...]}, relaxed_tags). Soft
+        preferences are relaxed slot by slot when nothing matches; a ValueError
+        is raised if the restrictions alone can't be met.
+        """
+        relaxed = set()
+        choices = {}
+        for slot in MEAL_SLOTS:
+            slot_tags = list(tags)
+            mask = self.mask(slot_tags, slot) & ~exclude_mask
+            for soft in SOFT_TAGS:
+                if mask:
+                    break
+                if soft in slot_tags:
+                    slot_tags.remove(soft)
+                    relaxed.add(soft)
+                    mask = self.mask(slot_tags, slot) & ~exclude_mask
+            if not mask:
+                wanted = " + ".join(slot_tags) or "available"
+                raise ValueError(f"No {slot} meals in the catalog are {wanted}" + (" after exclusions." if exclude_mask else "."))
+            choices[slot] = self.meals_in(mask)
+        return choices, relaxed
+
+_catalog: Optional[MealCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_meal_catalog() -> MealCatalog:
+    """The process-wide catalog, loaded on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = MealCatalog.load()
+    return _catalog
@@ -0,0 +1,167 @@
+"""
+Calorie- and macro-targeted meal plans over the meal catalog.
+
+The catalog is turned into a NumPy nutrient matrix (calories, protein,
+carbs, fat per meal). For a set of diet tags and exclusions, every
+breakfast x lunch x dinner combination is enumerated once and cached; a
+plan request then scores all combinations in a few vectorized operations:
+each day's portions are scaled towards the calorie target, the macro split
+is compared with the target split, and meals already used earlier in the
+week are penalized to keep the plan varied. The penalty only ranks
+combinations within tolerance of the target when there are any, so variety
+never costs accuracy.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from Health_Text import DAYS_PER_UNIT
+from Meal_Catalog import MEAL_SLOTS, PLAN_DAYS, MealCatalog, get_meal_catalog
+from Nutrition_Index import NutritionIndex, get_nutrition_index
+from Plan_Types import MealDay, MealPlan, PlannedMeal
+
+BASE_CALORIES = int(os.getenv("HEALTH_BASE_CALORIES", "2000"))  # Maintenance estimate without body data
+MIN_CALORIES, MAX_CALORIES = 1200, 3500
+KCAL_PER_KG = 7700
+MAX_DEFICIT, MIN_DEFICIT = 1000, 250
+GOAL_CALORIE_ADJUSTMENT = {"weight_loss": -500, "muscle_gain": 300, "fitness": 0}
+# (protein, carbs, fat) shares of calories
+DEFAULT_MACRO_SPLIT = (0.25, 0.45, 0.30)
+GOAL_MACRO_SPLIT = {
+    "weight_loss": (0.30, 0.40, 0.30),
+    "muscle_gain": (0.30, 0.45, 0.25),
+    "fitness": (0.25, 0.50, 0.25),
+}
+DIET_MACRO_SPLIT = {  # Diet tags override the goal split
+    "keto": (0.25, 0.05, 0.70),
+    "low-carb": (0.30, 0.20, 0.50),
+    "high-protein": (0.35, 0.35, 0.30),
+}
+PORTION_RANGE = (0.75, 2.0)
+CALORIE_TOLERANCE = 0.05  # Relative
+MACRO_TOLERANCE = 0.05    # Share of calories, per macro
+VARIETY_PENALTY = 0.05    # Added per earlier use of each meal in the combination
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0], dtype=np.float32)
+COMBO_CACHE_SIZE = 256
+
+def _goal_days(duration: str) -> Optional[int]:
+    match = re.match(r"(\d+)\s*(day|week|month)", duration or "")
+    return int(match.group(1)) * DAYS_PER_UNIT[match.group(2)] if match else None
+
+def nutrition_target(goal: Optional[dict] = None, tags=()) -> tuple:
+    """Daily (calories, (protein, carbs, fat) split) for an analyze_goal result and diet tags."""
+    calories = BASE_CALORIES
+    split = DEFAULT_MACRO_SPLIT
+    if goal:
+        goal_type = goal.get("goal_type")
+        calories += GOAL_CALORIE_ADJUSTMENT.get(goal_type, 0)
+        split = GOAL_MACRO_SPLIT.get(goal_type, split)
+        days = _goal_days(goal.get("duration", ""))
+        if goal_type == "weight_loss" and goal.get("metric") in ("kg", "pounds") and days:
+            kg = goal["quantity"] * (0.45359237 if goal["metric"] == "pounds" else 1.0)
+            deficit = min(max(kg * KCAL_PER_KG / days, MIN_DEFICIT), MAX_DEFICIT)
+            calories = BASE_CALORIES - deficit
+    for tag, diet_split in DIET_MACRO_SPLIT.items():
+        if tag in tags:
+            split = diet_split
+            break
+    return int(round(min(max(calories, MIN_CALORIES), MAX_CALORIES))), split
+
+class MealOptimizer:
+    def __init__(self, catalog: Optional[MealCatalog] = None):
+        self.catalog = catalog or get_meal_catalog()
+        self.nutrition = NutritionIndex(self.catalog) if catalog else get_nutrition_index()
+        self.nutrients = np.array(
+            [(m.calories, m.protein_g, m.carbs_g, m.fat_g) for m in self.catalog.meals], dtype=np.float32
+        )
+        self._combos: OrderedDict = OrderedDict()  # LRU by constraint set
+        self._lock = threading.Lock()
+
+    def combinations(self, tags, exclude=()) -> tuple:
+        """
+        Cached (meal indices K x 3, calories K, macro shares K x 3, relaxed tags)
+        for every breakfast x lunch x dinner combination matching the tags.
+        """
+        key = (tuple(sorted(set(tags))), tuple(sorted(set(exclude))))
+        with self._lock:
+            cached = self._combos.get(key)
+            if cached is not None:
+                self._combos.move_to_end(key)
+                return cached
+        choices, relaxed = self.catalog.slot_choices(key[0], self.nutrition.exclusion_mask(key[1]))
+        grids = np.meshgrid(*[np.array([m.id for m in choices[slot]], dtype=np.intp) for slot in MEAL_SLOTS], indexing="ij")
+        index = np.stack([grid.ravel() for grid in grids], axis=1)
+        totals = self.nutrients[index].sum(axis=1)  # K x 4
+        macro_kcal = totals[:, 1:] * KCAL_PER_GRAM
+        shares = macro_kcal / np.maximum(macro_kcal.sum(axis=1, keepdims=True), 1.0)
+        cached = (index, totals[:, 0], shares, frozenset(relaxed))
+        with self._lock:
+            self._combos[key] = cached
+            self._combos.move_to_end(key)
+            while len(self._combos) > COMBO_CACHE_SIZE:
+                self._combos.popitem(last=False)
+        return cached
+
+    def optimize(self, tags, calories: int, split, exclude=(), days: int = PLAN_DAYS) -> MealPlan:
+        """Pick one combination per day that best hits the target, varying meals across the week."""
+        index, combo_calories, shares, relaxed = self.combinations(tags, exclude)
+        scale = np.clip(calories / combo_calories, *PORTION_RANGE)
+        calorie_error = np.abs(combo_calories * scale - calories) / calories
+        macro_error = np.abs(shares - np.asarray(split, dtype=np.float32))
+        base_score = calorie_error + macro_error.sum(axis=1)
+        in_tolerance = (calorie_error <= CALORIE_TOLERANCE) & (macro_error.max(axis=1) <= MACRO_TOLERANCE)
+
+        # Vary meals among the combinations that meet the target; all of them only when none does
+        candidates = np.flatnonzero(in_tolerance)
+        if not len(candidates):
+            candidates = np.arange(len(index))
+        candidate_index, candidate_score = index[candidates], base_score[candidates]
+        used = np.zeros(len(self.nutrients), dtype=np.float32)
+        picks = []
+        for _ in range(days):
+            best = int(candidates[np.argmin(candidate_score + VARIETY_PENALTY * used[candidate_index].sum(axis=1))])
+            picks.append(best)
+            used[index[best]] += 1
+        return self._render(tags, calories, split, index, scale, shares, in_tolerance, picks, relaxed)
+
+    def _render(self, tags, calories, split, index, scale, shares, in_tolerance, picks, relaxed) -> MealPlan:
+        meals = self.catalog.meals
+        day_plans = [
+            MealDay(day, tuple(PlannedMeal.from_meal(meals[meal_id], float(scale[pick])) for meal_id in index[pick]))
+            for day, pick in enumerate(picks, 1)
+        ]
+        mean_shares = shares[picks].mean(axis=0)
+        return MealPlan(
+            day_plans,
+            total_calories=round(sum(day.calories for day in day_plans) / len(day_plans)) if day_plans else 0,
+            macros={name: f"{round(100 * float(v))}%" for name, v in zip(("protein", "carbs", "fat"), mean_shares)},
+            tags=sorted(set(tags)),
+            target={
+                "calories": calories,
+                "macros": {name: f"{round(100 * v)}%" for name, v in zip(("protein", "carbs", "fat"), split)},
+            },
+            within_tolerance=bool(in_tolerance[picks].all()),
+            relaxed_tags=sorted(relaxed) or None,
+        )
+
+_optimizer: Optional[MealOptimizer] = None
+_optimizer_lock = threading.Lock()
+
+def get_meal_optimizer() -> MealOptimizer:
+    """The process-wide optimizer over the shared catalog."""
+    global _optimizer
+    if _optimizer is None:
+        with _optimizer_lock:
+            if _optimizer is None:
+                _optimizer = MealOptimizer()
+    return _optimizer
+
+def optimize_meal_plan(tags, goal: Optional[dict] = None, exclude=(), days: int = PLAN_DAYS) -> MealPlan:
+    """Plan for diet tags, an optional analyze_goal result and excluded foods."""
+    calories, split = nutrition_target(goal, tags)
+    return get_meal_optimizer().optimize(tags, calories, split, exclude, days)
@@ -1,10 +1,11 @@
 from agents import Agent
+from Nutrition_Index import allergy_safe_meals_tool, meal_swap_tool
 
 def create_nutrition_expert_agent(handoff_description=None, hooks=None):
     return Agent(
         name="NutritionExpertAgent",
-        instructions="You are a nutrition expert. Help users with complex dietary needs such as diabetes or allergies, and provide specialized meal plans and advice.",
-        tools=[],
+        instructions="You are a nutrition expert. Help users with complex dietary needs such as diabetes or allergies, and provide specialized meal plans and advice. Use allergy_safe_meals to find catalog meals that avoid allergens (with glycemic=\"low\" for diabetes) and meal_swap to check a meal and suggest safe replacements.",
+        tools=[allergy_safe_meals_tool, meal_swap_tool],
         handoff_description=handoff_description,
         hooks=hooks,
     ) 
\ No newline at end of file
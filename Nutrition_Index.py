@@ -0,0 +1,258 @@
+"""
+Ingredient, allergen and glycemic-load indexes over the meal catalog.
+
+Each ingredient, allergen group and glycemic tag maps to a bitset of
+catalog meals (bit i set for meal i), so "breakfasts free of nuts and
+dairy with a low glycemic load" is a few integer ANDs. The nutrition
+expert agent gets these lookups as tools instead of reasoning over the
+whole catalog in the prompt.
+"""
+
+import difflib
+import re
+import threading
+from typing import NamedTuple, Optional
+
+from agents.tool import function_tool
+from Health_Text import parse_health_text
+from Meal_Catalog import DIET_TAGS, MEAL_SLOTS, Meal, MealCatalog, get_meal_catalog
+from Tool_Cache import memoize_tool
+
+# Catalog ingredients in each allergen group
+ALLERGEN_GROUPS = {
+    "nuts": ("nuts", "almond flour", "almond milk"),
+    "dairy": ("milk", "butter", "cheese", "cream cheese", "feta", "greek yogurt", "mozzarella", "parmesan", "ricotta",
+              "hollandaise", "caesar dressing", "ranch dressing"),
+    "gluten": ("pasta", "lasagna noodles", "couscous", "naan", "pita", "tortilla", "english muffin", "whole grain bread",
+               "whole grain cereal", "whole grain flour", "oats", "granola", "soy sauce"),
+    "eggs": ("eggs", "mayonnaise", "hollandaise", "caesar dressing"),
+    "soy": ("tofu", "tempeh", "edamame", "soy sauce"),
+    "fish": ("salmon", "tuna", "white fish", "caesar dressing"),
+    "shellfish": ("shrimp",),
+    "sesame": ("tahini", "hummus"),
+}
+# Words in user text that name an allergen group
+ALLERGEN_ALIASES = {
+    "nuts": ("nut", "nuts", "tree nut", "tree nuts", "peanut", "peanuts", "peanut butter", "nut butter", "almond", "almonds",
+             "walnut", "walnuts", "cashew", "cashews", "pecan", "pecans", "pistachio", "pistachios", "hazelnut", "hazelnuts"),
+    "dairy": ("dairy", "lactose", "milk", "cheese", "yogurt", "cream", "whey", "casein"),
+    "gluten": ("gluten", "wheat", "celiac", "coeliac", "barley", "rye"),
+    "eggs": ("egg", "eggs"),
+    "soy": ("soy", "soya"),
+    "fish": ("fish",),
+    "shellfish": ("shellfish", "shrimp", "shrimps", "prawn", "prawns", "crab", "lobster"),
+    "sesame": ("sesame",),
+}
+# Typical glycemic index of a meal's main carbohydrate; ingredients not listed count as low
+HIGH_GI_INGREDIENTS = frozenset({
+    "rice", "sushi rice", "arborio rice", "naan", "pita", "english muffin", "tortilla", "taco shells", "honey",
+    "granola", "couscous", "cornmeal",
+})
+MEDIUM_GI_INGREDIENTS = frozenset({
+    "pasta", "lasagna noodles", "brown rice", "oats", "sweet potato", "whole grain bread", "whole grain flour",
+    "banana", "mixed fruit", "quinoa", "whole grain cereal",
+})
+GLYCEMIC_INDEX = {"high": 70, "medium": 55, "low": 35}
+# Meal glycemic load (carbs_g x GI / 100) bands
+GLYCEMIC_TAGS = ("low", "medium", "high")
+LOW_GL_MAX, MEDIUM_GL_MAX = 15, 30
+MAX_LISTED = 8   # Meals listed per slot in tool output
+SWAP_COUNT = 3
+RESTRICTION_TAGS = frozenset({"vegetarian", "vegan", "gluten-free", "dairy-free"})
+
+class Avoidance(NamedTuple):
+    groups: tuple        # Allergen groups named in the text
+    ingredients: tuple   # Catalog ingredients named directly
+    unrecognized: tuple  # Terms matching neither
+
+def glycemic_load(meal: Meal) -> int:
+    ingredients = set(meal.ingredients)
+    level = "high" if ingredients & HIGH_GI_INGREDIENTS else "medium" if ingredients & MEDIUM_GI_INGREDIENTS else "low"
+    return round(meal.carbs_g * GLYCEMIC_INDEX[level] / 100)
+
+def glycemic_tag(load: int) -> str:
+    return "low" if load < LOW_GL_MAX else "medium" if load < MEDIUM_GL_MAX else "high"
+
+class NutritionIndex:
+    def __init__(self, catalog: MealCatalog):
+        self.catalog = catalog
+        self.ingredient_index: dict[str, int] = {}
+        self.allergen_index: dict[str, int] = {group: 0 for group in ALLERGEN_GROUPS}
+        self.glycemic_index: dict[str, int] = {tag: 0 for tag in GLYCEMIC_TAGS}
+        self.glycemic_loads = tuple(glycemic_load(meal) for meal in catalog.meals)
+        self.name_index = {meal.name.lower(): meal for meal in catalog.meals}
+        ingredient_groups = {}
+        for group, ingredients in ALLERGEN_GROUPS.items():
+            for ingredient in ingredients:
+                ingredient_groups.setdefault(ingredient, []).append(group)
+        for meal in catalog.meals:
+            bit = 1 << meal.id
+            self.glycemic_index[glycemic_tag(self.glycemic_loads[meal.id])] |= bit
+            for ingredient in meal.ingredients:
+                self.ingredient_index[ingredient] = self.ingredient_index.get(ingredient, 0) | bit
+                for group in ingredient_groups.get(ingredient, ()):
+                    self.allergen_index[group] |= bit
+        # Group aliases win over ingredient names; longest term first
+        self._terms = {ingredient: (None, ingredient) for ingredient in self.ingredient_index}
+        self._terms.update((alias, (group, None)) for group, aliases in ALLERGEN_ALIASES.items() for alias in aliases)
+        self._term_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(term) for term in sorted(self._terms, key=len, reverse=True)) + r")\b",
+            re.IGNORECASE,
+        )
+
+    def resolve(self, text: str) -> Avoidance:
+        """Allergen groups and catalog ingredients named in free text such as "no nuts, dairy or shrimp"."""
+        groups, ingredients, unrecognized = {}, {}, []
+        for term in re.split(r"[,;/]|\band\b|\bor\b", (text or "").lower()):
+            matches = self._term_pattern.findall(term)
+            for match in matches:
+                group, ingredient = self._terms[match.lower()]
+                if group:
+                    groups[group] = None
+                else:
+                    ingredients[ingredient] = None
+            if not matches and term.strip():
+                unrecognized.append(term.strip())
+        return Avoidance(tuple(groups), tuple(ingredients), tuple(unrecognized))
+
+    def avoid_mask(self, avoidance: Avoidance) -> int:
+        """Bitset of meals containing anything in `avoidance` (unrecognized terms match meal text)."""
+        mask = self.catalog.excluded_mask(avoidance.unrecognized) if avoidance.unrecognized else 0
+        for group in avoidance.groups:
+            mask |= self.allergen_index[group]
+        for ingredient in avoidance.ingredients:
+            mask |= self.ingredient_index.get(ingredient, 0)
+        return mask
+
+    def exclusion_mask(self, terms) -> int:
+        """avoid_mask for a list of exclusion terms, e.g. the meal planner's `exclude`."""
+        return self.avoid_mask(self.resolve(", ".join(terms)))
+
+    def glycemic_mask(self, max_tag: Optional[str]) -> int:
+        """Meals whose glycemic load is at most `max_tag` ("low", "medium", "high"); all meals if None."""
+        if not max_tag:
+            return self.catalog.all_mask
+        mask = 0
+        for tag in GLYCEMIC_TAGS[: GLYCEMIC_TAGS.index(max_tag) + 1]:
+            mask |= self.glycemic_index[tag]
+        return mask
+
+    def safe_mask(self, avoid: int, tags=(), slot: Optional[str] = None, glycemic: Optional[str] = None) -> int:
+        return self.catalog.mask(tags, slot) & ~avoid & self.glycemic_mask(glycemic)
+
+    def allergens_of(self, meal: Meal) -> list:
+        return [group for group, mask in self.allergen_index.items() if mask >> meal.id & 1]
+
+    def find_meal(self, name: str) -> Optional[Meal]:
+        """Catalog meal by name, allowing partial or slightly misspelled names."""
+        name = " ".join(name.lower().split())
+        if name in self.name_index:
+            return self.name_index[name]
+        partial = [meal for key, meal in self.name_index.items() if name in key]
+        if partial:
+            return min(partial, key=lambda meal: len(meal.name))
+        close = difflib.get_close_matches(name, self.name_index, n=1, cutoff=0.6)
+        return self.name_index[close[0]] if close else None
+
+    def swaps(self, meal: Meal, avoid: int, glycemic: Optional[str] = None, count: int = SWAP_COUNT) -> list:
+        """
+        Closest safe meals for the same slot: sharing the original's diet
+        restrictions where possible, then nearest in calories and protein.
+        """
+        mask = self.safe_mask(avoid | 1 << meal.id, slot=meal.slot, glycemic=glycemic)
+        restrictions = meal.tags & RESTRICTION_TAGS
+        return sorted(
+            self.catalog.meals_in(mask),
+            key=lambda other: (
+                len(restrictions - other.tags),
+                abs(other.calories - meal.calories) / meal.calories + abs(other.protein_g - meal.protein_g) / max(meal.protein_g, 10),
+            ),
+        )[:count]
+
+    def describe(self, meal: Meal) -> str:
+        """One-line summary used in tool output."""
+        load = self.glycemic_loads[meal.id]
+        return f"{meal.name} ({meal.calories} cal, {meal.carbs_g}g carbs, {glycemic_tag(load)} GL {load})"
+
+_index: Optional[NutritionIndex] = None
+_index_lock = threading.Lock()
+
+def get_nutrition_index() -> NutritionIndex:
+    """The process-wide index over the shared catalog."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NutritionIndex(get_meal_catalog())
+    return _index
+
+def _glycemic_arg(glycemic: str) -> Optional[str]:
+    glycemic = (glycemic or "").strip().lower()
+    if glycemic and glycemic not in GLYCEMIC_TAGS:
+        raise ValueError(f"glycemic must be one of {', '.join(GLYCEMIC_TAGS)} (or empty).")
+    return glycemic or None
+
+@memoize_tool("allergy_safe_meals")
+def allergy_safe_meals(allergies: str, diet_preferences: str = "", glycemic: str = ""):
+    """
+    List catalog meals free of the given allergens or ingredients, by meal slot.
+
+    Args:
+        allergies: Allergens or foods to avoid, e.g. "peanuts, dairy and shrimp".
+        diet_preferences: Diets every meal must follow, e.g. "vegan" (empty for any).
+        glycemic: Highest glycemic load allowed: "low", "medium" or "high" (empty for any). Use "low" for diabetes.
+    """
+    index = get_nutrition_index()
+    avoidance = index.resolve(allergies)
+    avoid = index.avoid_mask(avoidance)
+    keywords = parse_health_text(diet_preferences).keywords if diet_preferences else frozenset()
+    tags = [tag for tag in DIET_TAGS if tag in keywords]
+    max_glycemic = _glycemic_arg(glycemic)
+    meals = {}
+    total = 0
+    for slot in MEAL_SLOTS:
+        found = index.catalog.meals_in(index.safe_mask(avoid, tags, slot, max_glycemic))
+        if max_glycemic:
+            found.sort(key=lambda meal: index.glycemic_loads[meal.id])
+        total += len(found)
+        meals[slot] = {"count": len(found), "examples": [index.describe(meal) for meal in found[:MAX_LISTED]]}
+    return {
+        "avoiding": list(avoidance.groups) + list(avoidance.ingredients),
+        "unrecognized": list(avoidance.unrecognized),
+        "diet_tags": tags,
+        "max_glycemic_load": max_glycemic or "any",
+        "safe_meal_count": total,
+        "meals": meals,
+    }
+
+@memoize_tool("meal_swap")
+def meal_swap(meal: str, allergies: str = "", glycemic: str = ""):
+    """
+    Check a catalog meal for allergens and suggest the closest safe meals for the same slot.
+
+    Args:
+        meal: The meal's name, e.g. "Oatmeal with banana and nuts".
+        allergies: Allergens or foods to avoid, e.g. "nuts, dairy" (empty to only list the meal's allergens).
+        glycemic: Highest glycemic load allowed for swaps: "low", "medium" or "high" (empty for any).
+    """
+    index = get_nutrition_index()
+    found = index.find_meal(meal)
+    if found is None:
+        raise ValueError(f"No meal named '{meal}' in the catalog.")
+    avoidance = index.resolve(allergies)
+    avoid = index.avoid_mask(avoidance)
+    max_glycemic = _glycemic_arg(glycemic)
+    load = index.glycemic_loads[found.id]
+    conflicts = bool(avoid >> found.id & 1) or (max_glycemic is not None and not index.glycemic_mask(max_glycemic) >> found.id & 1)
+    return {
+        "meal": index.describe(found),
+        "slot": found.slot,
+        "ingredients": list(found.ingredients),
+        "allergens": index.allergens_of(found),
+        "glycemic_load": f"{glycemic_tag(load)} ({load})",
+        "safe": not conflicts,
+        "swaps": [index.describe(other) for other in index.swaps(found, avoid, max_glycemic)] if conflicts else [],
+    }
+
+allergy_safe_meals_tool = function_tool(allergy_safe_meals)
+meal_swap_tool = function_tool(meal_swap)
\ No newline at end of file
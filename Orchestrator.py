@@ -1,5 +1,12 @@
+import asyncio
+import threading
+from datetime import datetime
 from Context import UserSessionContext
-from agents import Runner
+from Plan_Types import MealPlan, WorkoutPlan
+import Async_Database as async_db
+from Prompt_Builder import build_agent_input
+from Session_Cache import SessionCache
+from Response_Cache import ResponseCache, RESPONSE_CACHE_ENABLED, response_cache_key
 from typing import Optional
 
 def update_context_after_tool(tool_name: str, tool_output: dict, user_input: str, context: UserSessionContext):
@@ -9,9 +16,9 @@ def update_context_after_tool(tool_name: str, tool_output: dict, user_input: str
     if tool_name == "analyze_goal":
         context.goal = tool_output
     elif tool_name == "meal_planner":
-        context.meal_plan = tool_output.get("days")
-    elif tool_name == "workout_recommender":
-        context.workout_plan = tool_output
+        context.meal_plan = MealPlan.coerce(tool_output)
+    elif tool_name in ("workout_recommender", "injury_safe_workout"):
+        context.workout_plan = WorkoutPlan.coerce(tool_output)
     elif tool_name == "progress_tracker":
         context.progress_logs.append({"input": user_input, "result": tool_output})
     elif tool_name == "checkin_scheduler":
@@ -22,25 +29,147 @@ def update_context_after_tool(tool_name: str, tool_output: dict, user_input: str
     # Add more as needed for handoffs, etc.
     return context
 
+def extract_response_text(result) -> str:
+    """Return the final text of a run result, or an empty string."""
+    if result is None:
+        return ""
+    output = getattr(result, "final_output", None)
+    return str(output).strip() if output else ""
+
 class HealthOrchestrator:
-    """Orchestrator for managing health agent interactions."""
+    """
+    Long-lived orchestrator for health agent turns.
+
+    Keeps one agent, one session cache and one background event loop for the
+    whole process, so the model client's connection pool and any caches stay
+    warm across turns. Async callers use run_turn; the CLIs use the sync shims,
+    which run coroutines on the background loop.
+    """
+    
+    def __init__(self, agent=None, sessions: Optional[SessionCache] = None,
+                 response_cache: Optional[ResponseCache] = None):
+        self._agent = agent
+        # Opt-in: pass a ResponseCache or set HEALTH_RESPONSE_CACHE=1
+        if response_cache is None and RESPONSE_CACHE_ENABLED:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+        self._owns_sessions = sessions is None
+        self._sessions = sessions
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def agent(self):
+        if self._agent is None:
+            from Agent import get_health_agent
+            self._agent = get_health_agent()
+        return self._agent
     
-    def __init__(self):
-        pass
+    @property
+    def sessions(self) -> SessionCache:
+        if self._sessions is None:
+            self._sessions = SessionCache()
+        return self._sessions
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="orchestrator-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+    
+    def run_coroutine(self, coro):
+        """Run a coroutine on the background loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
     
     def run_agent(self, agent, message: str, context: UserSessionContext):
         """
         Run the agent with the given message and context.
         Returns the agent's response.
         """
+        return self.run_coroutine(self.run_agent_async(agent, message, context, persist=False))
+
+    async def run_agent_async(self, agent, message: str, context: UserSessionContext, persist: bool = True):
+        """
+        Run the agent inside an existing event loop.
+        When persist is True the session is saved on the DB writer thread afterwards.
+        """
+        from agents import Runner  # Deferred so importing the orchestrator stays cheap
         try:
-            import asyncio
-            result = asyncio.run(Runner.run(
+            result = await Runner.run(
                 starting_agent=agent,
-                input=message,
+                input=build_agent_input(context, message),
                 context=context
-            ))
-            return result
+            )
         except Exception as e:
             print(f"Error running agent: {e}")
-            return None 
\ No newline at end of file
+            result = None
+        if persist:
+            await async_db.save_session(context)
+        return result
+    
+    async def run_agent_streamed_async(self, agent, message: str, context: UserSessionContext, **handlers) -> dict:
+        """
+        Stream one agent run (see Streaming.stream_agent). Errors are reported
+        like run_agent_async and return an empty text.
+        """
+        from Streaming import stream_agent
+        try:
+            return await stream_agent(agent, build_agent_input(context, message), context, **handlers)
+        except Exception as e:
+            print(f"\nError running agent: {e}")
+            return {"text": "", "ttft": None, "seconds": 0.0, "result": None}
+    
+    def run_agent_streamed(self, agent, message: str, context: UserSessionContext, **handlers) -> dict:
+        """Blocking wrapper that streams on the background loop."""
+        return self.run_coroutine(self.run_agent_streamed_async(agent, message, context, **handlers))
+
+    async def _run_for_text(self, message: str, context: UserSessionContext) -> str:
+        result = await self.run_agent_async(self.agent, message, context, persist=False)
+        return extract_response_text(result)
+    
+    async def run_turn(self, uid: int, message: str) -> str:
+        """
+        Run one chat turn for a stored user: load the session (cached), record
+        both messages and schedule the session for a write-behind save.
+        With a response cache, repeated questions are answered from it.
+        """
+        context = await async_db.run_read(self.sessions.get, uid)
+        if context is None:
+            raise ValueError(f"No session found for user {uid}")
+        context.conversation_history.append({
+            "role": "user",
+            "content": message,
+            "timestamp": datetime.now().isoformat()
+        })
+        if self.response_cache is not None:
+            key = response_cache_key(message, context, self.agent)
+            response = await self.response_cache.get_or_run(key, lambda: self._run_for_text(message, context))
+        else:
+            response = await self._run_for_text(message, context)
+        if response:
+            context.conversation_history.append({
+                "role": "assistant",
+                "content": response,
+                "timestamp": datetime.now().isoformat()
+            })
+        self.sessions.mark_dirty(context)
+        return response
+
+    def run_turn_sync(self, uid: int, message: str) -> str:
+        """Blocking wrapper around run_turn for synchronous callers."""
+        return self.run_coroutine(self.run_turn(uid, message))
+
+    def close(self):
+        """Stop the background loop and flush sessions this orchestrator owns."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        if self._owns_sessions and self._sessions is not None:
+            self._sessions.close()
\ No newline at end of file
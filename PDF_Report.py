@@ -1,6 +1,7 @@
 from fpdf import FPDF
 from Context import UserSessionContext
-from typing import Any
+from typing import Any, Optional
+import sqlite3
 import tempfile
 import os
 from datetime import datetime
@@ -13,8 +14,25 @@ class PDF(FPDF):
         self.cell(0, 10, "Health & Wellness Progress Report", ln=True, align="C")
         self.ln(10)
 
-def generate_user_report(context: UserSessionContext) -> str:
-    """Generate a comprehensive PDF report for the user."""
+def _recent_messages(context: UserSessionContext, limit: int = 10) -> list:
+    """Last messages for the report: in memory when enough are loaded, else stored ones if a database is set up."""
+    history = context.conversation_history
+    if len(history) >= limit or not context.uid:
+        return history[-limit:]
+    import Database
+    if not os.path.exists(Database.DB_PATH):
+        return history[-limit:]
+    try:
+        return Database.get_recent_messages(context.uid, limit) or history[-limit:]
+    except sqlite3.Error:  # Schema not initialized
+        return history[-limit:]
+
+def generate_user_report(context: UserSessionContext, recent_messages: Optional[list] = None) -> str:
+    """
+    Generate a comprehensive PDF report for the user. Callers holding the
+    session (e.g. the CLI's session cache) pass recent_messages; otherwise
+    they come from the context, or from the database for short histories.
+    """
     pdf = PDF()
     pdf.add_page()
     
@@ -70,8 +88,10 @@ def generate_user_report(context: UserSessionContext) -> str:
         pdf.set_font("Arial", "B", 12)
         pdf.cell(0, 10, "Current Meal Plan:", ln=True)
         pdf.set_font("Arial", size=10)
-        for i, meal in enumerate(context.meal_plan, 1):
-            pdf.cell(0, 8, f"Day {i}: {meal}", ln=True)
+        for day in context.meal_plan.day_plans:
+            pdf.cell(0, 8, f"Day {day.day}: {day.calories} cal" if day.calories else f"Day {day.day}:", ln=True)
+            for meal in day.meals:
+                pdf.cell(0, 6, f"  {meal.render()}", ln=True)
         pdf.ln(5)
     
     # Workout Plan
@@ -79,15 +99,13 @@ def generate_user_report(context: UserSessionContext) -> str:
         pdf.set_font("Arial", "B", 12)
         pdf.cell(0, 10, "Current Workout Plan:", ln=True)
         pdf.set_font("Arial", size=10)
-        if isinstance(context.workout_plan, dict):
-            for key, value in context.workout_plan.items():
-                if key == "days" and isinstance(value, list):
-                    for i, day in enumerate(value, 1):
-                        pdf.cell(0, 8, f"Day {i}: {day}", ln=True)
-                else:
-                    pdf.cell(0, 8, f"{key}: {value}", ln=True)
-        else:
-            pdf.cell(0, 8, str(context.workout_plan), ln=True)
+        for key, value in context.workout_plan.items():
+            if key != "days":
+                pdf.cell(0, 8, f"{key}: {', '.join(value) if isinstance(value, tuple) else value}", ln=True)
+        for day in context.workout_plan.day_plans:
+            pdf.cell(0, 8, f"Day {day.day}:", ln=True)
+            for exercise in day.exercises:
+                pdf.cell(0, 6, f"  {exercise.render()}", ln=True)
         pdf.ln(5)
     
     # Progress Logs
@@ -104,13 +122,12 @@ def generate_user_report(context: UserSessionContext) -> str:
         pdf.ln(5)
     
     # Recent Conversation History
-    if context.conversation_history:
+    recent_conversations = recent_messages if recent_messages is not None else _recent_messages(context)
+    if recent_conversations:
         pdf.set_font("Arial", "B", 12)
         pdf.cell(0, 10, "Recent Conversations:", ln=True)
         pdf.set_font("Arial", size=9)
         
-        # Show last 10 conversations
-        recent_conversations = context.conversation_history[-10:]
         for msg in recent_conversations:
             role = msg.get("role", "unknown")
             content = msg.get("content", "")
@@ -0,0 +1,273 @@
+"""
+Structured meal and workout plans.
+
+Plans keep one record per meal and per exercise (slotted NamedTuples), so
+callers read calories, macros, minutes or sets directly instead of parsing
+"Day 1: Breakfast - ... (300 cal)" strings. The day strings are rendered
+lazily, only when a plan is shown to the model or the user, and cached.
+
+Both plan types are read-only Mappings with the keys of the old plan dicts
+(plan["days"] is the tuple of day strings), and they serialize into the
+session as compact positional lists. Sessions saved with string plans are
+parsed into the structured form when loaded.
+"""
+
+import re
+from collections.abc import Mapping
+from typing import NamedTuple, Optional
+
+from pydantic_core import core_schema
+
+from Tool_Cache import freeze
+
+_DAY_PREFIX = re.compile(r"^\s*Day\s+(\d+):\s*")
+_MEAL_TEXT = re.compile(r"^(?P<slot>[^-]+?) - (?P<name>.+?)(?: \((?P<calories>\d+) cal(?:, x(?P<portion>\d+(?:\.\d+)?))?\))?$")
+_MINUTES = re.compile(r"(\d+)(?:-\d+)?\s*min\b")
+_SETS = re.compile(r"(\d+)\s*sets\b")
+_REPS = re.compile(r"(\d+(?:-\d+)?)\s*reps\b")
+PORTION_NOTE_MIN = 0.05  # Portions this close to 1x are not mentioned
+
+class PlannedMeal(NamedTuple):
+    slot: str
+    name: str
+    calories: Optional[int] = None     # For the planned portion
+    protein_g: Optional[float] = None
+    carbs_g: Optional[float] = None
+    fat_g: Optional[float] = None
+    portion: float = 1.0               # Multiple of the catalog serving
+
+    @classmethod
+    def from_meal(cls, meal, portion: float = 1.0) -> "PlannedMeal":
+        """A catalog meal scaled to `portion` servings."""
+        return cls(
+            meal.slot, meal.name, round(meal.calories * portion),
+            round(meal.protein_g * portion, 1), round(meal.carbs_g * portion, 1), round(meal.fat_g * portion, 1),
+            round(portion, 2),
+        )
+
+    @classmethod
+    def parse(cls, text: str) -> "PlannedMeal":
+        match = _MEAL_TEXT.match(text.strip())
+        if not match:
+            return cls("", text.strip())
+        calories, portion = match.group("calories"), match.group("portion")
+        return cls(
+            match.group("slot").lower(), match.group("name"),
+            int(calories) if calories else None, portion=float(portion) if portion else 1.0,
+        )
+
+    def render(self) -> str:
+        if not self.slot:
+            return self.name
+        text = f"{self.slot.title()} - {self.name}"
+        if self.calories is not None:
+            portion_note = f", x{self.portion:.2f}" if abs(self.portion - 1.0) >= PORTION_NOTE_MIN else ""
+            text += f" ({self.calories} cal{portion_note})"
+        return text
+
+class MealDay(NamedTuple):
+    day: int
+    meals: tuple  # PlannedMeal per slot
+
+    @property
+    def calories(self) -> int:
+        return sum(meal.calories or 0 for meal in self.meals)
+
+    def render(self) -> str:
+        return f"Day {self.day}: " + " | ".join(meal.render() for meal in self.meals)
+
+class PlannedExercise(NamedTuple):
+    kind: str                      # "Cardio", "Legs", "Rest day", ...
+    detail: str = ""
+    minutes: Optional[int] = None  # Lower bound when a range is given
+    sets: Optional[int] = None
+    reps: Optional[str] = None     # "12" or a range such as "8-12"
+
+    @classmethod
+    def parse(cls, text: str) -> "PlannedExercise":
+        kind, _, detail = text.strip().partition(" - ")
+        minutes, sets, reps = _MINUTES.search(detail), _SETS.search(detail), _REPS.search(detail)
+        return cls(
+            kind, detail,
+            int(minutes.group(1)) if minutes else None,
+            int(sets.group(1)) if sets else None,
+            reps.group(1) if reps else None,
+        )
+
+    def render(self) -> str:
+        return f"{self.kind} - {self.detail}" if self.detail else self.kind
+
+class WorkoutDay(NamedTuple):
+    day: int
+    exercises: tuple  # PlannedExercise per block
+
+    @property
+    def rest(self) -> bool:
+        return any(exercise.kind.lower().startswith("rest") for exercise in self.exercises)
+
+    def render(self) -> str:
+        return f"Day {self.day}: " + " | ".join(exercise.render() for exercise in self.exercises)
+
+def _split_day(text: str, number: int) -> tuple:
+    """(day number, " | "-separated parts) of a legacy "Day N: ..." line."""
+    match = _DAY_PREFIX.match(text)
+    if match:
+        number, text = int(match.group(1)), text[match.end():]
+    return number, [part for part in text.split(" | ") if part.strip()]
+
+def _trim_defaults(item: tuple) -> list:
+    values = list(item)
+    for name in reversed(item._fields):
+        if name not in item._field_defaults or values[-1] != item._field_defaults[name]:
+            break
+        values.pop()
+    return values
+
+class _Plan(Mapping):
+    """Read-only plan; a Mapping over FIELDS with "days" rendered on demand."""
+    __slots__ = ("day_plans", "_days_text", "_text")
+    FIELDS: tuple = ()
+
+    def __init__(self, day_plans, **fields):
+        set_field = object.__setattr__
+        set_field(self, "day_plans", tuple(day_plans))
+        for name in self.FIELDS:
+            set_field(self, name, freeze(fields.get(name)))
+        set_field(self, "_days_text", None)
+        set_field(self, "_text", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    # Immutable, so copies can share it; pickling rebuilds from the session form
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self).coerce, (self.to_session(),))
+
+    @property
+    def days(self) -> tuple:
+        """The day strings, rendered once on first use."""
+        if self._days_text is None:
+            object.__setattr__(self, "_days_text", tuple(day.render() for day in self.day_plans))
+        return self._days_text
+
+    def __getitem__(self, key):
+        if key == "days":
+            return self.days
+        if key in self.FIELDS and getattr(self, key) is not None:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield "days"
+        yield from (name for name in self.FIELDS if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return 1 + sum(getattr(self, name) is not None for name in self.FIELDS)
+
+    def __str__(self) -> str:
+        if self._text is None:
+            object.__setattr__(self, "_text", "\n".join([*self._headline(), *self.days]))
+        return self._text
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self.day_plans)} days)"
+
+    def _headline(self) -> list:
+        return []
+
+    def to_dict(self) -> dict:
+        """JSON-ready form with one dict per meal or exercise, for reports."""
+        data = {"days": [
+            {"day": day.day, **{name: [item._asdict() for item in items] for name, items in zip(day._fields[1:], day[1:])}}
+            for day in self.day_plans
+        ]}
+        data.update((name, getattr(self, name)) for name in self.FIELDS if getattr(self, name) is not None)
+        return data
+
+    def to_session(self) -> dict:
+        """
+        Compact form stored in the session: each meal or exercise is a
+        positional list, without trailing fields left at their defaults.
+        """
+        data = {"days": [[_trim_defaults(item) for item in day[1]] for day in self.day_plans]}
+        data.update((name, getattr(self, name)) for name in self.FIELDS if getattr(self, name) is not None)
+        return data
+
+    @classmethod
+    def coerce(cls, value):
+        """Build a plan from a plan, its session form, or a legacy list/dict of day strings."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, (list, tuple)):
+            value = {"days": value}
+        if not isinstance(value, Mapping):
+            raise ValueError(f"Cannot build a {cls.__name__} from {type(value).__name__}")
+        days = []
+        for number, day in enumerate(value.get("days") or (), 1):
+            if isinstance(day, str):
+                days.append(cls._parse_day(day, number))
+            else:
+                days.append(cls._day_type(number, tuple(cls._item_type(*item) for item in day)))
+        return cls(days, **{name: value.get(name) for name in cls.FIELDS})
+
+    @classmethod
+    def _parse_day(cls, text: str, number: int):
+        number, parts = _split_day(text, number)
+        return cls._day_type(number, tuple(cls._item_type.parse(part) for part in parts))
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda plan: plan.to_session(), when_used="json"),
+        )
+
+class MealPlan(_Plan):
+    __slots__ = ("total_calories", "macros", "tags", "target", "within_tolerance", "relaxed_tags")
+    FIELDS = __slots__
+    _day_type, _item_type = MealDay, PlannedMeal
+
+    def _headline(self) -> list:
+        lines = []
+        if self.total_calories is not None:
+            line = f"{len(self.day_plans)}-day meal plan"
+            if self.tags:
+                line += f" ({', '.join(self.tags)})"
+            line += f": about {self.total_calories} cal/day"
+            if self.macros:
+                line += ", " + " / ".join(f"{name} {share}" for name, share in self.macros.items())
+            lines.append(line)
+        if self.target:
+            line = f"Target: {self.target['calories']} cal/day, " + " / ".join(f"{name} {share}" for name, share in self.target["macros"].items())
+            if self.within_tolerance is not None:
+                line += " (met)" if self.within_tolerance else " (closest match in the catalog)"
+            lines.append(line)
+        if self.relaxed_tags:
+            lines.append(f"Relaxed preferences: {', '.join(self.relaxed_tags)}")
+        return lines
+
+class WorkoutPlan(_Plan):
+    __slots__ = ("intensity", "duration", "focus_areas", "injuries", "substitutions")
+    FIELDS = __slots__
+    _day_type, _item_type = WorkoutDay, PlannedExercise
+
+    def _headline(self) -> list:
+        details = []
+        if self.intensity:
+            details.append(f"{self.intensity} intensity")
+        if self.duration:
+            details.append(f"{self.duration} per session")
+        if self.focus_areas:
+            details.append(f"focus: {', '.join(self.focus_areas)}")
+        lines = [f"{len(self.day_plans)}-day workout plan: " + "; ".join(details)] if details else []
+        if self.injuries:
+            lines.append(f"Adapted for: {', '.join(self.injuries)}")
+        if self.substitutions:
+            lines.append(f"Substitutions: {'; '.join(self.substitutions)}")
+        return lines
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Token-budgeted input assembly for agent turns.
+
+Each turn sends the user's profile (goal, diet, injuries, plans), a rolling
+summary of older turns and as many recent turns as fit in the input token
+budget. The summary is stored on the session and only extended with turns
+that have left the recent window since the last build, so summarization
+work per turn stays constant.
+"""
+
+import os
+import re
+
+from Context import UserSessionContext
+
+INPUT_TOKEN_BUDGET = int(os.getenv("HEALTH_AGENT_INPUT_TOKENS", "3000"))
+SUMMARY_TOKEN_BUDGET = 400   # Upper bound for the rolling summary
+PROFILE_TOKEN_BUDGET = 600   # Upper bound for the goal/plan section
+MAX_RECENT_MESSAGES = 20     # Older turns are folded into the summary
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators per message
+SUMMARY_LINE_CHARS = 160
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+def count_tokens(text: str) -> int:
+    """Estimate the token count locally (no tokenizer download or API call)."""
+    if not text:
+        return 0
+    # Long words split into several tokens; roughly one extra per 8 characters
+    return sum(1 + len(piece) // 8 for piece in _TOKEN_PATTERN.findall(text))
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    # Shrink by characters until the estimate fits (approx. 4 chars per token)
+    text = text[: budget * 4]
+    while text and count_tokens(text) > budget:
+        text = text[: int(len(text) * 0.9)]
+    return text.rstrip() + " ..."
+
+def _profile_text(context: UserSessionContext) -> str:
+    lines = [f"User: {context.name} (ID: {context.uid})"]
+    if context.goal:
+        lines.append(f"Goal: {context.goal}")
+    if context.diet_preferences:
+        lines.append(f"Diet preferences: {context.diet_preferences}")
+    if context.injury_notes:
+        lines.append(f"Injury notes: {context.injury_notes}")
+    if context.meal_plan:
+        lines.append(f"Current meal plan: {context.meal_plan}")
+    if context.workout_plan:
+        lines.append(f"Current workout plan: {context.workout_plan}")
+    return _truncate_to_tokens("\n".join(lines), PROFILE_TOKEN_BUDGET)
+
+def _summary_line(msg: dict) -> str:
+    content = " ".join(msg.get("content", "").split())
+    first_sentence = _SENTENCE_END.split(content, 1)[0]
+    if len(first_sentence) > SUMMARY_LINE_CHARS:
+        first_sentence = first_sentence[:SUMMARY_LINE_CHARS].rstrip() + "..."
+    return f"{msg.get('role', 'user')}: {first_sentence}"
+
+def update_summary(context: UserSessionContext, upto: int):
+    """
+    Fold messages with absolute index below `upto` into context.history_summary.
+    Only messages past context.summary_cursor are processed.
+    """
+    with context._history_lock:  # The session flusher may trim history meanwhile
+        offset = context._history_offset
+        start = max(context.summary_cursor, offset)
+        if upto <= start:
+            return
+        folded = context.conversation_history[start - offset:upto - offset]
+    lines = context.history_summary.split("\n") if context.history_summary else []
+    lines += [_summary_line(msg) for msg in folded]
+    # Keep the newest lines that fit the summary budget
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > SUMMARY_TOKEN_BUDGET:
+        lines.pop(0)
+    context.history_summary = "\n".join(lines)
+    context.summary_cursor = upto
+
+def _item_role(role: str) -> str:
+    return role if role in ("user", "assistant", "system") else "user"
+
+def build_agent_input(context: UserSessionContext, message: str, budget: int = INPUT_TOKEN_BUDGET) -> list:
+    """Build the Runner.run input list for one turn within `budget` tokens."""
+    with context._history_lock:
+        # Copy with its offset so a trim on the session flusher can't shift indices under us
+        history, offset = list(context.conversation_history), context._history_offset
+    # The CLIs record the user message before running; don't send it twice
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == message:
+        history = history[:-1]
+
+    profile = _profile_text(context)
+    remaining = (
+        budget
+        - count_tokens(profile)
+        - count_tokens(message)
+        - SUMMARY_TOKEN_BUDGET
+        - 3 * MESSAGE_OVERHEAD_TOKENS
+    )
+    recent = []
+    for msg in reversed(history[-MAX_RECENT_MESSAGES:]):
+        cost = count_tokens(msg.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        if cost > remaining:
+            break
+        recent.append(msg)
+        remaining -= cost
+    recent.reverse()
+
+    # Everything older than the recent window belongs in the summary
+    update_summary(context, offset + len(history) - len(recent))
+
+    preamble = "User profile:\n" + profile
+    if context.history_summary:
+        preamble += "\n\nSummary of earlier conversation:\n" + context.history_summary
+    items = [{"role": "system", "content": preamble}]
+    items += [{"role": _item_role(msg.get("role", "user")), "content": msg.get("content", "")} for msg in recent]
+    items.append({"role": "user", "content": message})
+    return items
@@ -5,17 +5,21 @@ Reset database script to ensure correct schema.
 
 import os
 import sqlite3
-from Database import DB_PATH
+from Database import DB_PATH, close_pool
 
 def reset_database():
     """Reset the database with correct schema."""
     print("🗄️ Resetting database...")
     
     try:
-        # Remove existing database file
+        # Release pooled connections, then remove existing database file
+        close_pool()
         if os.path.exists(DB_PATH):
             os.remove(DB_PATH)
             print(f"✅ Removed existing database: {DB_PATH}")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(DB_PATH + suffix):
+                os.remove(DB_PATH + suffix)
         
         # Recreate database with correct schema
         from Database import init_db
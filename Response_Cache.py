@@ -0,0 +1,146 @@
+"""
+Persistent cache of agent responses, shared across users.
+
+Opt-in (HEALTH_RESPONSE_CACHE=1). A response is reused when the normalized
+message, the profile fields that shape advice (CACHE_CONTEXT_FIELDS), the
+user's name and uid, the conversation the prompt carries (summary and
+unsummarized turns) and the agent/prompt version all match. Everything the
+prompt includes is in the key, so an answer is never served to another user
+or to a different conversation. Entries expire after RESPONSE_CACHE_TTL and
+the least recently used rows are pruned beyond RESPONSE_CACHE_MAX_ENTRIES.
+Concurrent identical requests are coalesced into a single model call.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+import Async_Database as async_db
+from Context import UserSessionContext
+from Database import get_pool
+
+RESPONSE_CACHE_ENABLED = os.getenv("HEALTH_RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_TTL = float(os.getenv("HEALTH_RESPONSE_CACHE_TTL", str(24 * 3600)))  # Seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("HEALTH_RESPONSE_CACHE_SIZE", "10000"))
+# Bump to invalidate every cached response after a behaviour change the agent fingerprint can't see
+PROMPT_VERSION = os.getenv("HEALTH_PROMPT_VERSION", "1")
+PRUNE_INTERVAL = 100  # Stores between pruning passes
+
+# Profile fields the prompt includes (Prompt_Builder._profile_text)
+CACHE_CONTEXT_FIELDS = ("name", "uid", "goal", "diet_preferences", "injury_notes", "meal_plan", "workout_plan")
+
+def normalize_message(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return " ".join(message.lower().split()).rstrip("?!. ")
+
+def context_fingerprint(context: UserSessionContext) -> str:
+    fields = {name: getattr(context, name) for name in CACHE_CONTEXT_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def history_fingerprint(context: UserSessionContext, message: str) -> str:
+    """Hash of the conversation the prompt is built from: the summary and every turn it doesn't cover yet."""
+    with context._history_lock:
+        start = max(context.summary_cursor - context._history_offset, 0)
+        turns = [(msg.get("role", ""), msg.get("content", "")) for msg in context.conversation_history[start:]]
+    # The current message is keyed separately (normalized); build_agent_input drops it from the history too
+    if turns and turns[-1] == ("user", message):
+        turns.pop()
+    material = {"summary": context.history_summary, "cursor": context.summary_cursor, "turns": turns}
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+def agent_fingerprint(agent) -> str:
+    """Hash of what shapes the agent's answers: instructions, model, tools and handoffs."""
+    parts = [
+        getattr(agent, "name", ""),
+        str(getattr(agent, "instructions", "")),
+        str(getattr(agent, "model", "")),
+        ",".join(sorted(tool.name for tool in getattr(agent, "tools", []))),
+    ]
+    handoffs = getattr(agent, "handoffs", [])
+    parts.append(",".join(sorted(getattr(h, "name", str(h)) for h in (handoffs.values() if isinstance(handoffs, dict) else handoffs))))
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+def response_cache_key(message: str, context: UserSessionContext, agent) -> str:
+    material = "\x00".join((PROMPT_VERSION, agent_fingerprint(agent), normalize_message(message),
+                           context_fingerprint(context), history_fingerprint(context, message)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def get_cached_response(key: str, ttl: float = RESPONSE_CACHE_TTL) -> str | None:
+    """Return the cached response if it is younger than ttl, else None."""
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            "SELECT response FROM response_cache WHERE key = ? AND created_at > ?", (key, time.time() - ttl)
+        ).fetchone()
+    return row[0] if row else None
+
+def touch_response(key: str):
+    """Record a hit so LRU pruning keeps the entry."""
+    with get_pool().connection(write=True) as conn:
+        conn.execute("UPDATE response_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+
+def store_response(key: str, response: str):
+    now = time.time()
+    with get_pool().connection(write=True) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+
+def prune_response_cache(max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL) -> int:
+    """Delete expired rows and the least recently used rows beyond max_entries."""
+    with get_pool().connection(write=True) as conn:
+        removed = conn.execute("DELETE FROM response_cache WHERE created_at <= ?", (time.time() - ttl,)).rowcount
+        removed += conn.execute("""
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,)).rowcount
+    return removed
+
+class ResponseCache:
+    """Async front end with single-flight coalescing; use from one event loop."""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._stores = 0
+        self.hits = self.misses = self.coalesced = 0
+
+    async def get_or_run(self, key: str, run) -> str:
+        """Return the cached response for key, or await run() (once per key at a time) and cache it."""
+        cached = await async_db.run_read(get_cached_response, key, self.ttl)
+        if cached is not None:
+            self.hits += 1
+            await async_db.run_write(touch_response, key)
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            response = await asyncio.shield(pending)
+            if response is not None:
+                return response
+            return await run()  # The shared call failed; run our own
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        response = None
+        try:
+            response = await run()
+            if response:
+                await async_db.run_write(self._store, key, response)
+            return response
+        finally:
+            del self._inflight[key]
+            future.set_result(response or None)
+
+    def _store(self, key: str, response: str):
+        store_response(key, response)
+        self._stores += 1
+        if self._stores % PRUNE_INTERVAL == 0:
+            prune_response_cache(self.max_entries, self.ttl)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "inflight": len(self._inflight)}
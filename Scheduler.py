@@ -1,11 +1,15 @@
 from typing import TypedDict
 from agents.tool import function_tool
 from Guardrails import validate_goal_input
+from Tool_Cache import memoize_tool
+from datetime import date
 
 class CheckinStatusDict(TypedDict):
     status: str
     user_id: int
 
+# The next check-in only changes with the calendar day, so cache per user per day
+@memoize_tool("checkin_scheduler", key=lambda user_id: (user_id, date.today().isoformat()))
 def checkin_scheduler(user_id: int):
     """Schedule a weekly check-in for the user and return status as a dict."""
     if not isinstance(user_id, int) or user_id <= 0:
@@ -0,0 +1,173 @@
+"""
+Write-behind cache of UserSessionContext objects.
+
+Chat turns mark their session dirty instead of saving it. A background
+flusher commits dirty sessions in batched transactions when the flush
+interval elapses or enough sessions are dirty, so the fsync stays off the
+response path and writes from many active users are merged.
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+
+import Database
+from Context import UserSessionContext
+
+SESSION_CACHE_SIZE = int(os.getenv("HEALTH_SESSION_CACHE_SIZE", "1024"))
+FLUSH_INTERVAL = 2.0    # Seconds between background flushes
+FLUSH_BATCH_SIZE = 64   # Dirty sessions that trigger an early flush
+
+class SessionCache:
+    """LRU cache of sessions keyed by uid with dirty tracking."""
+
+    def __init__(self, capacity: int = SESSION_CACHE_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 flush_batch_size: int = FLUSH_BATCH_SIZE):
+        self.capacity = max(1, capacity)
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._entries: OrderedDict[int, UserSessionContext] = OrderedDict()
+        self._dirty: set[int] = set()
+        self._unsaved: dict[int, UserSessionContext] = {}  # Evicted while dirty and not written yet
+        self._flushing: dict[int, list] = {}  # Taken by a write that hasn't committed yet, oldest first
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get(self, uid: int) -> UserSessionContext | None:
+        """Return the cached session, loading it from the database on a miss."""
+        with self._lock:
+            context = self._entries.get(uid)
+            if context is not None:
+                self._entries.move_to_end(uid)
+                return context
+            context = self._unsaved.pop(uid, None)
+            in_flight = self._flushing.get(uid)
+        if context is not None:
+            # Newer than the stored copy; cache it again and keep retrying the write
+            self._insert(context, dirty=True)
+            return context
+        if in_flight:
+            # Evicted while its write is in progress; the stored copy may still be older.
+            # A failed write marks it dirty again because it is back in the cache.
+            context = in_flight[-1]
+            self._insert(context, dirty=False)
+            return context
+        context = Database.load_session(uid)
+        if context is not None:
+            self._insert(context, dirty=False)
+        return context
+
+    def put(self, context: UserSessionContext):
+        """Cache a session without scheduling a write."""
+        self._insert(context, dirty=False)
+
+    def mark_dirty(self, context: UserSessionContext):
+        """Cache a session and schedule it for the next batched write."""
+        self._insert(context, dirty=True)
+
+    def _insert(self, context: UserSessionContext, dirty: bool):
+        with self._lock:
+            self._entries[context.uid] = context
+            self._entries.move_to_end(context.uid)
+            if dirty:
+                self._dirty.add(context.uid)
+            while len(self._entries) > self.capacity:
+                uid, old = self._entries.popitem(last=False)
+                if uid in self._dirty:
+                    # Dirty sessions leaving the cache are held until the flusher writes them
+                    self._dirty.discard(uid)
+                    self._unsaved[uid] = old
+            pending = len(self._dirty) + len(self._unsaved)
+        if pending >= self.flush_batch_size:
+            self._wake.set()
+
+    def recent_messages(self, uid: int, limit: int = 10) -> list:
+        """Last `limit` messages, including ones not flushed yet."""
+        with self._lock:
+            context = self._entries.get(uid)
+        if context is not None and len(context.conversation_history) >= limit:
+            return context.conversation_history[-limit:]
+        self.flush([uid])
+        return Database.get_recent_messages(uid, limit)
+
+    def flush(self, uids=None):
+        """
+        Write dirty sessions (all, or only the given uids) in one transaction.
+        With uids, also waits for a write of those sessions already in progress.
+        """
+        with self._lock:
+            targets = self._dirty if uids is None else self._dirty.intersection(uids)
+            batch = [self._entries[uid] for uid in targets if uid in self._entries]
+            self._dirty.difference_update(targets)
+            unsaved = list(self._unsaved) if uids is None else [uid for uid in uids if uid in self._unsaved]
+            batch.extend(self._unsaved.pop(uid) for uid in unsaved)
+            waiting = uids is not None and any(uid in self._flushing for uid in uids)
+            for context in batch:
+                self._flushing.setdefault(context.uid, []).append(context)
+        saved = self._save(batch)
+        if waiting:
+            with self._flush_lock:  # Let a write of these sessions already in progress finish
+                pass
+        return saved
+
+    def _save(self, batch: list) -> bool:
+        """
+        Write a batch; on failure every session in it stays pending (dirty,
+        or held in _unsaved once evicted) for the next flush. Errors are
+        reported here rather than raised into the chat turn. Sessions leave
+        _flushing only once the write has committed or they are pending again.
+        """
+        if not batch:
+            return True
+        with self._flush_lock:
+            try:
+                Database.save_sessions(batch)
+                saved = True
+            except Exception as e:
+                print(f"Session flush failed ({len(batch)} sessions, will retry): {e}")
+                saved = False
+            with self._lock:
+                for context in batch:
+                    if not saved:
+                        if self._entries.get(context.uid) is context:
+                            self._dirty.add(context.uid)
+                        else:
+                            self._unsaved.setdefault(context.uid, context)
+                    self._release(context)
+            return saved
+
+    def _release(self, context: UserSessionContext):
+        """Drop one in-flight entry for the session (call with _lock held)."""
+        in_flight = self._flushing[context.uid]
+        del in_flight[next(i for i, pending in enumerate(in_flight) if pending is context)]
+        if not in_flight:
+            del self._flushing[context.uid]
+
+    def evict(self, uid: int):
+        """Flush and drop a session (e.g. on logout); a failed write stays queued."""
+        self.flush([uid])
+        with self._lock:
+            context = self._entries.pop(uid, None)
+            if context is not None and uid in self._dirty:
+                self._dirty.discard(uid)
+                self._unsaved[uid] = context
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()  # Failures are reported and retried on the next tick
+
+    def close(self):
+        """Stop the background flusher and write everything still dirty."""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+        self.flush()
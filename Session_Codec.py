@@ -0,0 +1,32 @@
+"""
+Versioned encodings for stored session payloads.
+
+Each stored payload carries a codec id so rows written in an older format
+stay readable; rows are rewritten in the current codec on their next save.
+"""
+
+import os
+import zlib
+
+CODEC_JSON = 0        # Plain JSON text (format of rows written before codecs existed)
+CODEC_ZLIB_JSON = 1   # zlib-compressed UTF-8 JSON
+
+DEFAULT_CODEC = int(os.getenv("HEALTH_SESSION_CODEC", str(CODEC_ZLIB_JSON)))
+COMPRESS_MIN_BYTES = 256   # Smaller payloads are not worth compressing
+COMPRESS_LEVEL = 6
+
+def encode_payload(text: str, codec: int | None = None) -> tuple[int, str | bytes]:
+    """Encode a JSON string with `codec` (DEFAULT_CODEC if None); returns (codec id, value to store)."""
+    if codec is None:
+        codec = DEFAULT_CODEC
+    if codec == CODEC_ZLIB_JSON and len(text) >= COMPRESS_MIN_BYTES:
+        return CODEC_ZLIB_JSON, zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+    return CODEC_JSON, text
+
+def decode_payload(codec: int | None, data: str | bytes) -> str:
+    """Decode a stored value back into its JSON string."""
+    if not codec:
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+    if codec == CODEC_ZLIB_JSON:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown session codec: {codec}")
@@ -1,3 +1,45 @@
-def stream_output(step_stream):
-    for step in step_stream:
-        print(step.pretty_output) 
\ No newline at end of file
+import sys
+import time
+from agents import Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+def print_text_delta(delta: str):
+    """Write a text delta straight to the terminal."""
+    sys.stdout.write(delta)
+    sys.stdout.flush()
+
+def print_run_event(name: str, detail: str):
+    """Show tool calls and handoffs on their own line while streaming."""
+    if name == "tool_called":
+        print(f"\n   🔧 Using {detail}...")
+    elif name == "handoff":
+        print(f"\n   ↪️ Handing off to {detail}")
+
+async def stream_agent(agent, agent_input, context, on_text=print_text_delta, on_event=print_run_event) -> dict:
+    """
+    Run the agent with Runner.run_streamed, passing text deltas to on_text and
+    tool-start/handoff events to on_event as they arrive.
+
+    Returns {"text", "ttft", "seconds", "result"}; ttft is the time to the
+    first text delta (None if no text was streamed).
+    """
+    start = time.perf_counter()
+    ttft = None
+    chunks = []
+    result = Runner.run_streamed(starting_agent=agent, input=agent_input, context=context)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            if isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                chunks.append(event.data.delta)
+                if on_text:
+                    on_text(event.data.delta)
+        elif event.type == "run_item_stream_event" and on_event:
+            if event.name == "tool_called":
+                on_event("tool_called", getattr(event.item.raw_item, "name", "a tool"))
+            elif event.name == "handoff_occured":
+                on_event("handoff", event.item.target_agent.name)
+    # The final output is the last agent's answer; chunks also hold text from earlier agents
+    text = str(result.final_output).strip() if result.final_output else "".join(chunks).strip()
+    return {"text": text, "ttft": ttft, "seconds": time.perf_counter() - start, "result": result}
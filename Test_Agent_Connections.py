@@ -24,8 +24,8 @@ async def test_agent_connections():
             print(f"   Tool {i+1}: {tool.name}")
             
         # List handoffs
-        for handoff_name, handoff_agent in agent.handoffs.items():
-            print(f"   Handoff '{handoff_name}': {handoff_agent.name}")
+        for handoff_agent in agent.handoffs:
+            print(f"   Handoff: {handoff_agent.name}")
             
     except Exception as e:
         print(f"❌ Failed to create agent: {e}")
@@ -6,7 +6,7 @@ Complete flow test - from user creation to chat functionality.
 import asyncio
 from Database import init_db, create_user, get_user_by_email, load_session, save_session
 from Context import UserSessionContext
-from Agent import create_health_agent
+from Agent import get_health_agent
 from Orchestrator import HealthOrchestrator
 
 def test_complete_flow():
@@ -48,7 +48,7 @@ def test_complete_flow():
         
         # 4. Create agent and orchestrator
         print("\n4️⃣ Creating agent and orchestrator...")
-        agent = create_health_agent()
+        agent = get_health_agent()
         orchestrator = HealthOrchestrator()
         print(f"✅ Agent created: {agent.name}")
         print(f"✅ Orchestrator created")
@@ -4,7 +4,7 @@ Test script to verify context persistence across multiple interactions.
 """
 
 import asyncio
-from Agent import create_health_agent
+from Agent import get_health_agent
 from Context import UserSessionContext
 from agents import Runner
 from Database import init_db, save_session, load_session
@@ -17,7 +17,7 @@ async def test_context_persistence():
     init_db()
     
     # Create agent and context
-    agent = create_health_agent()
+    agent = get_health_agent()
     context = UserSessionContext(name="TestUser", uid=999)
     
     # Test 1: Set a goal
@@ -70,7 +70,7 @@ async def test_conversation_history():
     """Test that conversation history is properly maintained."""
     print("\n📝 Testing Conversation History...")
     
-    agent = create_health_agent()
+    agent = get_health_agent()
     context = UserSessionContext(name="TestUser", uid=1000)
     
     # Simulate a conversation
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Test script to verify session storage (round trips, history archiving, session and
+response caches) against a scratch database.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import traceback
+from types import SimpleNamespace
+import Database
+from Context import UserSessionContext
+from Hooks import record_tool_result
+from Response_Cache import ResponseCache, response_cache_key
+from Session_Cache import SessionCache
+from Tracker import progress_tracker
+from Scheduler import checkin_scheduler
+
+def use_scratch_database(directory: str):
+    """Point Database at a fresh file so the tests never touch user_sessions.db."""
+    Database.close_pool()
+    Database.DB_PATH = os.path.join(directory, "test_sessions.db")
+    Database.init_db()
+
+def test_tool_results_round_trip():
+    """Progress and check-in results recorded by the hooks must load back."""
+    print("\n📈 Testing tool results round trip...")
+    context = UserSessionContext(name="Storage User", uid=Database.create_user("Storage User"))
+    context.conversation_history.append({"role": "user", "content": "Lost 1kg this week"})
+    run_context = SimpleNamespace(context=context)
+
+    record_tool_result(run_context, SimpleNamespace(name="progress_tracker"),
+                       progress_tracker(context.uid, "Lost 1kg this week"))
+    record_tool_result(run_context, SimpleNamespace(name="checkin_scheduler"),
+                       checkin_scheduler(context.uid))
+    Database.save_session(context)
+
+    # A second load checks the session stays readable after being rewritten
+    for attempt in range(2):
+        loaded = Database.load_session(context.uid)
+        if loaded is None or len(loaded.progress_logs) != 2:
+            print("❌ Progress logs did not survive the round trip")
+            return False
+        Database.save_session(loaded)
+
+    result = loaded.progress_logs[0]["result"]
+    if result["category"] != "weight" or result["update"] != "Lost 1kg this week":
+        print(f"❌ Unexpected progress result: {result}")
+        return False
+    print("✅ Progress and check-in results load back intact")
+    return True
+
+def test_history_persistence():
+    """Appended turns survive trimming and archiving, complete and in order."""
+    print("\n📜 Testing conversation history persistence...")
+    context = new_session("History User")
+    total = 0
+    for batch in range(15):
+        for _ in range(37):
+            total += 1
+            add_turn(context, f"Turn {total}")
+        Database.save_session(context)
+        # Persisted turns beyond the hot window leave memory; indices stay absolute
+        if len(context.conversation_history) > Database.HISTORY_WINDOW:
+            print(f"❌ In-memory history not trimmed: {len(context.conversation_history)} messages")
+            return False
+        if context._history_offset + len(context.conversation_history) != total:
+            print("❌ History offset lost track of trimmed messages")
+            return False
+    # Saving again without new turns must not append anything (append-only log)
+    Database.save_session(context)
+    expected = [f"Turn {i}" for i in range(1, total + 1)]
+    if Database.count_messages(context.uid) != total:
+        print(f"❌ Stored {Database.count_messages(context.uid)} messages, expected {total}")
+        return False
+
+    with Database.get_pool().connection() as conn:
+        segments = conn.execute("SELECT COUNT(*) FROM message_segments WHERE uid = ?", (context.uid,)).fetchone()[0]
+    if not segments:
+        print("❌ Old messages were never archived")
+        return False
+
+    newest_first = list(Database.iter_history(context.uid, page_size=40))
+    if [msg["seq"] for msg in newest_first] != list(range(total, 0, -1)):
+        print("❌ iter_history skipped or reordered messages")
+        return False
+    if [msg["content"] for msg in reversed(newest_first)] != expected:
+        print("❌ iter_history returned the wrong content")
+        return False
+    page = list(Database.iter_history(context.uid, before=total - 300, page_size=40))
+    if [msg["seq"] for msg in page] != list(range(total - 301, 0, -1)):
+        print("❌ iter_history did not resume below `before`")
+        return False
+
+    full = Database.load_session(context.uid, history_limit=None)
+    if [msg["content"] for msg in full.conversation_history] != expected:
+        print("❌ Full history load is incomplete or out of order")
+        return False
+    recent = Database.load_session(context.uid)
+    if [msg["content"] for msg in recent.conversation_history] != expected[-Database.HISTORY_WINDOW:]:
+        print("❌ Recent window load returned the wrong messages")
+        return False
+
+    # A reloaded session continues the same log
+    add_turn(recent, "Turn after reload")
+    Database.save_session(recent)
+    if Database.get_recent_messages(context.uid, 2) != [{"role": "user", "content": expected[-1]},
+                                                         {"role": "user", "content": "Turn after reload"}]:
+        print("❌ Turn saved after a reload was not appended at the end")
+        return False
+    print(f"✅ {total + 1} messages across {segments} archive segments come back complete and in order")
+    return True
+
+def test_response_cache_per_user():
+    """Users with the same goal asking the same question must not share an answer."""
+    print("\n🗂️ Testing response cache isolation...")
+    agent = SimpleNamespace(name="Health Agent", instructions="Help", model="test", tools=[], handoffs=[])
+    goal = {"goal_type": "weight_loss", "target": "lose 5kg"}
+    alice = UserSessionContext(name="Alice", uid=101, goal=goal)
+    bob = UserSessionContext(name="Bob", uid=102, goal=goal)
+    message = "What should I eat today?"
+
+    if response_cache_key(message, alice, agent) == response_cache_key(message, bob, agent):
+        print("❌ Two users share a response cache key")
+        return False
+    repeat_key = response_cache_key(message, alice, agent)
+    alice.conversation_history.append({"role": "assistant", "content": "Try oats for breakfast."})
+    if response_cache_key(message, alice, agent) == repeat_key:
+        print("❌ Conversation history is not part of the key")
+        return False
+
+    async def ask(context, answer):
+        context.conversation_history.append({"role": "user", "content": message})
+        async def run():
+            return answer
+        return await cache.get_or_run(response_cache_key(message, context, agent), run)
+
+    cache = ResponseCache()
+    first = asyncio.run(ask(alice, "Answer for Alice"))
+    second = asyncio.run(ask(bob, "Answer for Bob"))
+    if (first, second) != ("Answer for Alice", "Answer for Bob") or cache.hits:
+        print(f"❌ Cached answer leaked between users: {first!r}, {second!r}")
+        return False
+    print("✅ Each user gets their own cache entry")
+    return True
+
+def new_session(name: str) -> UserSessionContext:
+    context = UserSessionContext(name=name, uid=Database.create_user(name))
+    Database.save_session(context)
+    return context
+
+def add_turn(context: UserSessionContext, text: str):
+    context.conversation_history.append({"role": "user", "content": text})
+
+class BlockingSave:
+    """Stand-in for Database.save_sessions that holds each write until released and can fail it."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._save = Database.save_sessions
+
+    def __call__(self, contexts):
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise OSError("disk unavailable")
+        self._save(contexts)
+
+def test_session_cache_miss_during_flush():
+    """A session evicted while its write is in flight is served from memory, and a failed write is retried."""
+    print("\n💾 Testing session cache miss during a flush...")
+    cache = SessionCache(capacity=1, flush_interval=3600)
+    first, second = new_session("Flush One"), new_session("Flush Two")
+    original_save = Database.save_sessions
+    try:
+        cache.mark_dirty(first)
+        add_turn(first, "Ran 5k this morning")
+        cache.put(second)  # Evicts the dirty first session into the unsaved queue
+
+        blocker = BlockingSave(fail=True)
+        Database.save_sessions = blocker
+        flusher = threading.Thread(target=cache.flush)
+        flusher.start()
+        blocker.started.wait(5)
+        served = cache.get(first.uid)  # Not cached, not committed yet
+        blocker.release.set()
+        flusher.join()
+        if served is not first:
+            print("❌ Miss during the flush reloaded the older stored copy")
+            return False
+        if first.uid not in cache._dirty:
+            print("❌ Failed write was not queued for retry")
+            return False
+
+        Database.save_sessions = original_save
+        if not cache.flush():
+            print("❌ Retry after the failed write did not succeed")
+            return False
+        stored = Database.load_session(first.uid)
+        if [msg["content"] for msg in stored.conversation_history] != ["Ran 5k this morning"]:
+            print(f"❌ Retried write lost the turn: {stored.conversation_history}")
+            return False
+    finally:
+        Database.save_sessions = original_save
+        cache.close()
+    print("✅ In-flight session served from memory and written on retry")
+    return True
+
+def test_session_cache_failed_evicted_write():
+    """A failed write of an evicted session keeps it pending until a later flush succeeds."""
+    print("\n🔁 Testing retry of an evicted session after a failed write...")
+    cache = SessionCache(capacity=1, flush_interval=3600)
+    first, second = new_session("Retry One"), new_session("Retry Two")
+    original_save = Database.save_sessions
+    try:
+        cache.mark_dirty(first)
+        add_turn(first, "Ate lentil soup for lunch")
+        cache.put(second)
+
+        blocker = BlockingSave(fail=True)
+        blocker.release.set()
+        Database.save_sessions = blocker
+        if cache.flush():
+            print("❌ Flush reported success although the write failed")
+            return False
+        Database.save_sessions = original_save
+        if cache.get(first.uid) is not first:
+            print("❌ Session with a failed write was reloaded from the database")
+            return False
+        cache.flush()
+        stored = Database.load_session(first.uid)
+        if [msg["content"] for msg in stored.conversation_history] != ["Ate lentil soup for lunch"]:
+            print(f"❌ Turn missing after the retry: {stored.conversation_history}")
+            return False
+    finally:
+        Database.save_sessions = original_save
+        cache.close()
+    print("✅ Failed write stayed pending and was written on the next flush")
+    return True
+
+def test_legacy_history_migration():
+    """History kept in old session blobs moves to the messages table when the schema is upgraded."""
+    print("\n🏛️ Testing legacy history migration...")
+    uid = Database.create_user("Legacy User")
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Legacy turn {i}"} for i in range(5)]
+    blob = {"name": "Legacy User", "uid": uid, "goal": {"goal_type": "weight_loss"}, "conversation_history": history}
+    with Database.get_pool().connection(write=True) as conn:
+        conn.execute(
+            "UPDATE sessions SET data = ?, codec = 0 WHERE uid = ?", (json.dumps(blob), uid)
+        )
+        conn.execute("PRAGMA user_version = 6")
+    Database.close_pool()
+    Database.init_db()  # Runs the pending migration
+
+    with Database.get_pool().connection() as conn:
+        codec, data = conn.execute("SELECT codec, data FROM sessions WHERE uid = ?", (uid,)).fetchone()
+    if "conversation_history" in json.loads(Database.decode_payload(codec, data)):
+        print("❌ Session blob still carries its history")
+        return False
+    loaded = Database.load_session(uid)
+    if [msg["content"] for msg in loaded.conversation_history] != [msg["content"] for msg in history]:
+        print(f"❌ Migrated history is incomplete: {loaded.conversation_history}")
+        return False
+    if loaded.goal != blob["goal"]:
+        print("❌ Migration changed the rest of the session")
+        return False
+    print("✅ Legacy history migrated once at startup")
+    return True
+
+def main():
+    """Run all session storage tests."""
+    print("🧪 Session Storage Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Tool Results Round Trip", test_tool_results_round_trip),
+        ("History Persistence", test_history_persistence),
+        ("Response Cache Per User", test_response_cache_per_user),
+        ("Session Cache Miss During Flush", test_session_cache_miss_during_flush),
+        ("Session Cache Failed Evicted Write", test_session_cache_failed_evicted_write),
+        ("Legacy History Migration", test_legacy_history_migration),
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    with tempfile.TemporaryDirectory() as directory:
+        use_scratch_database(directory)
+        try:
+            for test_name, test_func in tests:
+                try:
+                    if test_func():
+                        passed += 1
+                    else:
+                        print(f"❌ {test_name} test failed")
+                except Exception as e:
+                    print(f"❌ {test_name} test crashed: {e}")
+                    traceback.print_exc()
+        finally:
+            Database.close_pool()
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
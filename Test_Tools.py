@@ -3,9 +3,11 @@
 Test script to verify all tools provide real, meaningful responses.
 """
 
+from types import SimpleNamespace
+from Context import UserSessionContext
 from Goal_Analyzer import analyze_goal
-from Meal_Planner import meal_planner
-from Workout_Recommender import workout_recommender
+from Meal_Planner import meal_planner, _meal_planner_for_session
+from Workout_Recommender import workout_recommender, _workout_recommender_for_session
 from Scheduler import checkin_scheduler
 from Tracker import progress_tracker
 
@@ -94,6 +96,22 @@ def test_all_tools():
         else:
             print("❌ Still returning generic response!")
     
+    # Test 6: Stored session profile
+    print("\n6️⃣ Testing Tools With a Stored Profile:")
+    print("-" * 30)
+    context = UserSessionContext(name="Tool User", uid=1, injury_notes="knee pain", goal=analyze_goal("lose 5kg in 2 months"))
+    run_context = SimpleNamespace(context=context)
+    result = _workout_recommender_for_session(run_context, "lose weight")
+    if result == workout_recommender("lose weight", "knee pain") and result != workout_recommender("lose weight"):
+        print("✅ Stored injury notes shape the workout plan!")
+    else:
+        print("❌ Workout plan ignores the stored injury notes!")
+    result = _meal_planner_for_session(run_context, "vegetarian")
+    if result == meal_planner("vegetarian", "lose 5kg in 2 months"):
+        print("✅ Stored goal sizes the meal plan!")
+    else:
+        print("❌ Meal plan ignores the stored goal!")
+    
     print("\n" + "=" * 50)
     print("🎉 Tool Testing Complete!")
     print("\nAll tools should now provide real, meaningful responses instead of generic 'Sample' responses.")
@@ -0,0 +1,125 @@
+"""
+Process-wide memoization for the deterministic planning tools.
+
+Tool results are cached by tool name and normalized input in a bounded LRU
+with a time-to-live. Cached values are frozen (read-only dicts and tuples)
+so one result object can be shared by every user without copying.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TOOL_CACHE_SIZE = int(os.getenv("HEALTH_TOOL_CACHE_SIZE", "4096"))
+TOOL_CACHE_TTL = float(os.getenv("HEALTH_TOOL_CACHE_TTL", "3600"))  # Seconds
+
+class FrozenDict(dict):
+    """A dict that refuses mutation; still JSON- and pydantic-serializable."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached tool results are read-only; copy with dict(...) first")
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    def __ior__(self, other):
+        self._readonly()
+    def __hash__(self):
+        return hash(tuple(self.items()))
+    # copy/pickle rebuild dicts through __setitem__; rebuild from the items instead
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self  # Immutable all the way down (see freeze)
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return value if isinstance(value, FrozenDict) else FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def normalize_text(text) -> str:
+    """Cache key form of free text: lowercase with collapsed whitespace."""
+    return " ".join(str(text).lower().split())
+
+class ToolCache:
+    """Thread-safe LRU + TTL cache with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize: int = TOOL_CACHE_SIZE, ttl: float = TOOL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        # Compute outside the lock; a concurrent miss just computes the same value twice
+        value = freeze(compute())
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+TOOL_CACHE = ToolCache()
+
+def memoize_tool(name: str, key=None, echo=None, cache: ToolCache = TOOL_CACHE):
+    """
+    Cache a tool function's (frozen) result. `key` maps the call arguments to
+    the cache key; by default every argument is normalized as text.
+    `echo` maps result fields that repeat the input to a function of the call
+    arguments, so each caller gets its own wording back rather than that of
+    the call that filled the cache.
+    Exceptions (e.g. failed validation) are not cached.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = (name, key(*args, **kwargs))
+            else:
+                cache_key = (name,) + tuple(normalize_text(a) for a in args) + tuple(
+                    (k, normalize_text(v)) for k, v in sorted(kwargs.items()))
+            value = cache.get_or_compute(cache_key, lambda: func(*args, **kwargs))
+            if echo:
+                value = FrozenDict({**value, **{field: freeze(build(*args, **kwargs)) for field, build in echo.items()}})
+            return value
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+def tool_cache_stats() -> dict:
+    return TOOL_CACHE.stats()
@@ -1,38 +1,37 @@
 from typing import TypedDict
 from agents.tool import function_tool
 from Guardrails import validate_goal_input
+from Tool_Cache import memoize_tool
+from Health_Text import parse_health_text
 from datetime import datetime
-import re
 
 class ProgressUpdateDict(TypedDict):
     status: str
     user_id: int
     update: str
 
-def progress_tracker(user_id: int, update: str):
-    """Track progress and update context, returning a dict."""
-    if not isinstance(update, str) or len(update.strip()) < 3:
-        raise ValueError("Invalid progress update input.")
-    
+@memoize_tool("progress_tracker")
+def analyze_update(update: str):
+    """Classify a progress update and pick coaching text (cached; no per-call fields)."""
     # Analyze the update to extract key information
-    update_lower = update.lower()
+    features = parse_health_text(update)
+    keywords = features.keywords
     
     # Extract weight changes
     weight_change = None
-    if "lost" in update_lower or "lose" in update_lower:
-        weight_match = re.search(r'(\d+(?:\.\d+)?)\s*(kg|pounds?|lbs?)', update_lower)
-        if weight_match:
-            weight_change = f"-{weight_match.group(1)} {weight_match.group(2)}"
+    if "lost" in keywords or "lose" in keywords:
+        if features.quantity is not None:
+            weight_change = f"-{features.quantity:g} {features.quantity_unit}"
     
     # Determine progress category
     progress_category = "general"
-    if any(word in update_lower for word in ["weight", "lost", "gain", "pound", "kg"]):
+    if any(word in keywords for word in ["weight", "lost", "gain", "pound", "kg"]):
         progress_category = "weight"
-    elif any(word in update_lower for word in ["workout", "exercise", "gym", "run", "cardio"]):
+    elif any(word in keywords for word in ["workout", "exercise", "gym", "run", "cardio"]):
         progress_category = "fitness"
-    elif any(word in update_lower for word in ["meal", "diet", "food", "eat"]):
+    elif any(word in keywords for word in ["meal", "diet", "food", "eat"]):
         progress_category = "nutrition"
-    elif any(word in update_lower for word in ["energy", "mood", "feel", "sleep"]):
+    elif any(word in keywords for word in ["energy", "mood", "feel", "sleep"]):
         progress_category = "wellness"
     
     # Generate motivational response
@@ -45,10 +44,6 @@ def progress_tracker(user_id: int, update: str):
     }
     
     return {
-        "status": "progress updated",
-        "user_id": user_id,
-        "update": update,
-        "timestamp": datetime.now().isoformat(),
         "category": progress_category,
         "weight_change": weight_change,
         "motivational_message": motivational_responses.get(progress_category, motivational_responses["general"]),
@@ -60,4 +55,18 @@ def progress_tracker(user_id: int, update: str):
         ]
     }
 
+def progress_tracker(user_id: int, update: str):
+    """Track progress and update context, returning a dict."""
+    if not isinstance(update, str) or len(update.strip()) < 3:
+        raise ValueError("Invalid progress update input.")
+    
+    analysis = analyze_update(update)
+    return {
+        "status": "progress updated",
+        "user_id": user_id,
+        "update": update,
+        "timestamp": datetime.now().isoformat(),
+        **analysis
+    }
+
 progress_tracker_tool = function_tool(progress_tracker) 
\ No newline at end of file
@@ -95,8 +95,8 @@ def verify_main_agent():
             
         # List handoffs
         print("  📋 Handoffs:")
-        for handoff_name, handoff_agent in agent.handoffs.items():
-            print(f"    - {handoff_name}: {handoff_agent.name}")
+        for handoff_agent in agent.handoffs:
+            print(f"    - {handoff_agent.name}")
             
         return True
         